@@ -1,4 +1,70 @@
-from accounts.models import User, Token
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.throttling import release
+from accounts.tokens import redeem_token
+
+
+class UserCache(object):
+    '''bounded least recently used cache of users, local to the process
+
+    entries expire after ttl seconds, which bounds how long another worker
+    can keep serving a user deleted through a different process
+    '''
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, email):
+        with self.lock:
+            entry = self.entries.get(email)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[email]
+                return None
+            self.entries.move_to_end(email)
+            return user
+
+    def set(self, email, user):
+        with self.lock:
+            self.entries[email] = (user, time.monotonic() + self.ttl)
+            self.entries.move_to_end(email)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, email):
+        with self.lock:
+            self.entries.pop(email, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def pending_login_key(email):
+    '''throttling claim held while a freshly sent login link is unused'''
+    return f'pending-login:{email}'
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
 
 
 class PasswordlessAuthenticationBackend(object):
@@ -6,16 +72,21 @@ class PasswordlessAuthenticationBackend(object):
 
     def authenticate(self, uid):
         '''authenticate'''
-        try:
-            token = Token.objects.get(uid=uid)
-            return User.objects.get(email=token.email)
-        except User.DoesNotExist:
-            return User.objects.create(email=token.email)
-        except Token.DoesNotExist:
-            return None
+        with transaction.atomic():
+            email = redeem_token(uid)
+            if email is None:
+                return None
+            user, _ = User.objects.get_or_create(email=email)
+        user_cache.set(user.email, user)
+        release(pending_login_key(user.email))
+        return user
 
     def get_user(self, email):
-        try:
-            return User.objects.get(email=email)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        user = user_cache.get(email)
+        if user is None:
+            try:
+                user = User.objects.get(email=email)
+            except User.DoesNotExist:
+                return None
+            user_cache.set(email, user)
+        return user
@@ -0,0 +1,29 @@
+from django.core.checks import Error, register
+
+from accounts.throttling import cache_is_shared
+from accounts.tokens import USED_TOKEN_CACHE, signed_mode
+
+
+@register('caches', deploy=True)
+def check_throttling_cache(app_configs, **kwargs):
+    '''login throttling and coalescing only work across workers with a shared cache'''
+    if cache_is_shared():
+        return []
+    return [Error(
+        'Login email throttling is kept in a per-process cache.',
+        hint='Set MEMCACHED_LOCATION so every worker counts in the same cache.',
+        id='accounts.E001',
+    )]
+
+
+@register('caches')
+def check_signed_token_cache(app_configs, **kwargs):
+    '''signed login tokens are only single use if every worker sees the used ones'''
+    if not signed_mode() or cache_is_shared(USED_TOKEN_CACHE):
+        return []
+    return [Error(
+        "LOGIN_TOKEN_MODE = 'signed' needs a login_tokens cache shared by every worker.",
+        hint='Set LOGIN_TOKEN_CACHE_LOCATION to a memcached started with -M, otherwise '
+             'a login link can be replayed once per worker until it expires.',
+        id='accounts.E002',
+    )]
@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from accounts.management.commands.purge_tokens import purge_stale_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions and stale login tokens in small batches, '
+        'safe to run next to the live site'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='seconds to sleep between batches')
+        parser.add_argument('--analyze', action='store_true',
+                            help='refresh the query planner statistics afterwards')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='return free pages to the file system afterwards')
+        parser.add_argument('--vacuum-pages', type=int, default=1000,
+                            help='most pages freed by --vacuum, 0 for all')
+
+    def handle(self, *args, **options):
+        for name, purge in (('sessions', purge_expired_sessions),
+                            ('tokens', purge_stale_tokens)):
+            start = time.time()
+            deleted = purge(options['batch_size'], options['pause'])
+            elapsed = time.time() - start
+            self.stdout.write(
+                f'Deleted {deleted} {name} in {elapsed:.2f}s '
+                f'({deleted / elapsed if elapsed else 0:.0f} rows/s)'
+            )
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            if options['analyze']:
+                cursor.execute('ANALYZE')
+                self.stdout.write('Analyzed')
+            if options['vacuum']:
+                self.vacuum(cursor, options['vacuum_pages'])
+
+    def vacuum(self, cursor, pages):
+        '''free pages without the exclusive lock a full VACUUM takes'''
+        cursor.execute('PRAGMA auto_vacuum')
+        if cursor.fetchone()[0] != 2:
+            self.stderr.write(
+                'Skipped vacuum: the database is not in incremental auto_vacuum '
+                'mode. Switch it once, with the site stopped, by running '
+                '"PRAGMA auto_vacuum = INCREMENTAL; VACUUM;"'
+            )
+            return
+        cursor.execute('PRAGMA freelist_count')
+        free_before = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA incremental_vacuum({int(pages)})')
+        cursor.fetchall()  # the pragma frees one page per result row
+        cursor.execute('PRAGMA freelist_count')
+        self.stdout.write(f'Vacuumed {free_before - cursor.fetchone()[0]} pages')
+
+
+def purge_expired_sessions(batch_size, pause):
+    '''walk the session table in session_key ranges, deleting expired sessions
+
+    like purge_stale_tokens, every range gets its own short transaction
+    '''
+    deleted = 0
+    last_key = ''
+    while True:
+        keys = list(
+            Session.objects.filter(session_key__gt=last_key).order_by('session_key')
+            .values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(
+            session_key__gte=keys[0], session_key__lte=keys[-1],
+            expire_date__lt=timezone.now()
+        ).delete()[0]
+        last_key = keys[-1]
+        time.sleep(pause)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Token
+
+
+class Command(BaseCommand):
+    help = 'Delete used and expired login tokens in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        start = time.time()
+        deleted = purge_stale_tokens(options['batch_size'], options['pause'])
+        self.stdout.write(f'Deleted {deleted} tokens in {time.time() - start:.2f}s')
+
+
+def purge_stale_tokens(batch_size, pause):
+    '''walk the token table in id ranges, deleting stale tokens of each range
+
+    every range is deleted in its own short transaction so that the SQLite
+    write lock is never held for long
+    '''
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Token.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Token.objects.stale().filter(
+            id__gte=ids[0], id__lte=ids[-1]
+        ).delete()[0]
+        last_id = ids[-1]
+        time.sleep(pause)
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = 'Send emails waiting in the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--backoff', type=float, default=30,
+                            help='seconds before the first retry, doubled on each failure')
+        parser.add_argument('--loop', action='store_true',
+                            help='keep polling the outbox instead of exiting when empty')
+        parser.add_argument('--poll-interval', type=float, default=1)
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        start = time.time()
+        while True:
+            sent, failed = send_batch(
+                options['batch_size'], options['max_attempts'], options['backoff']
+            )
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                elapsed = time.time() - start
+                self.stdout.write(
+                    f'sent {sent}, failed {failed}; '
+                    f'{total_sent} sent in {elapsed:.1f}s '
+                    f'({total_sent / elapsed:.1f}/s)'
+                )
+            if sent + failed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['poll_interval'])
+        self.stdout.write(f'Sent {total_sent} emails, {total_failed} failed attempts')
+
+
+def send_batch(batch_size, max_attempts, backoff):
+    '''send due emails over a single connection, returns (sent, failed)'''
+    now = timezone.now()
+    emails = list(
+        QueuedEmail.objects.filter(next_attempt__lte=now, attempts__lt=max_attempts)
+        .order_by('id')[:batch_size]
+    )
+    if not emails:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            record_failure(email, e, now, backoff)
+        return 0, len(emails)
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.to],
+                connection=connection
+            )
+            try:
+                message.send()
+            except Exception as e:
+                record_failure(email, e, now, backoff)
+                failed += 1
+            else:
+                email.delete()
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def record_failure(email, error, now, backoff):
+    email.attempts += 1
+    email.next_attempt = now + timedelta(seconds=backoff * 2 ** (email.attempts - 1))
+    email.last_error = repr(error)
+    email.save(update_fields=['attempts', 'next_attempt', 'last_error'])
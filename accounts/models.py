@@ -1,6 +1,11 @@
 import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.contrib import auth
+from django.utils import timezone
 auth.signals.user_logged_in.disconnect(auth.models.update_last_login)
 
 
@@ -14,6 +19,38 @@ class User(models.Model):
     is_authenticated = True
 
 
+class TokenQuerySet(models.QuerySet):
+
+    @staticmethod
+    def expiry_cutoff():
+        '''tokens created before this moment have expired'''
+        return timezone.now() - timedelta(seconds=settings.LOGIN_TOKEN_TTL)
+
+    def valid(self):
+        '''unused tokens that have not expired'''
+        return self.filter(used=False, created__gte=self.expiry_cutoff())
+
+    def stale(self):
+        '''used or expired tokens, safe to delete'''
+        return self.filter(Q(used=True) | Q(created__lt=self.expiry_cutoff()))
+
+
 class Token(models.Model):
     email = models.EmailField()
-    uid = models.CharField(default=uuid.uuid4, max_length=40)
+    uid = models.CharField(default=uuid.uuid4, max_length=40, unique=True)
+    created = models.DateTimeField(default=timezone.now)
+    used = models.BooleanField(default=False)
+
+    objects = TokenQuerySet.as_manager()
+
+
+class QueuedEmail(models.Model):
+    '''email waiting in the outbox for the send_queued_emails worker'''
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    created = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True, default='')
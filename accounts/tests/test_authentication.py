@@ -1,7 +1,14 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from accounts.authentication import PasswordlessAuthenticationBackend
+from accounts.authentication import (
+    PasswordlessAuthenticationBackend, UserCache, user_cache)
 from accounts.models import Token
+from accounts.throttling import claim, hit, release
 
 User = get_user_model()
 
@@ -32,10 +39,33 @@ class AuthenticateTest(TestCase):
         returning_user = PasswordlessAuthenticationBackend().authenticate(token.uid)
         self.assertEqual(returning_user, user)
 
+    def test_returns_None_if_token_expired(self):
+        token = Token.objects.create(
+            email='edith@example.com', created=timezone.now() - timedelta(days=1)
+        )
+        self.assertIsNone(PasswordlessAuthenticationBackend().authenticate(token.uid))
+
+    def test_token_can_only_be_used_once(self):
+        token = Token.objects.create(email='edith@example.com')
+        backend = PasswordlessAuthenticationBackend()
+        self.assertIsNotNone(backend.authenticate(token.uid))
+        self.assertIsNone(backend.authenticate(token.uid))
+
+    def test_token_stays_unused_if_user_creation_fails(self):
+        token = Token.objects.create(email='edith@example.com')
+        with patch.object(User.objects, 'get_or_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                PasswordlessAuthenticationBackend().authenticate(token.uid)
+        token.refresh_from_db()
+        self.assertFalse(token.used)
+
 
 class GetUserTest(TestCase):
     '''test get user'''
 
+    def setUp(self):
+        user_cache.clear()
+
     def test_gets_user_by_email(self):
         '''test: egts user by email address'''
         User.objects.create(email='another@example.com')
@@ -49,4 +79,82 @@ class GetUserTest(TestCase):
         '''test: returns None if no user with that email'''
         self.assertIsNone(
             PasswordlessAuthenticationBackend().get_user('edith@example.com')
-        )
\ No newline at end of file
+        )
+
+    def test_caches_found_user(self):
+        '''test: second lookup does not hit the database'''
+        User.objects.create(email='edith@example.com')
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user('edith@example.com')
+        with self.assertNumQueries(0):
+            user = backend.get_user('edith@example.com')
+        self.assertEqual(user.email, 'edith@example.com')
+
+    def test_deleted_user_is_dropped_from_cache(self):
+        '''test: deleting user invalidates cache'''
+        user = User.objects.create(email='edith@example.com')
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user('edith@example.com')
+        user.delete()
+        self.assertIsNone(backend.get_user('edith@example.com'))
+
+    def test_authenticate_fills_cache(self):
+        '''test: user logging in is cached for the next request'''
+        token = Token.objects.create(email='edith@example.com')
+        backend = PasswordlessAuthenticationBackend()
+        backend.authenticate(token.uid)
+        with self.assertNumQueries(0):
+            backend.get_user('edith@example.com')
+
+
+class UserCacheTest(TestCase):
+    '''test user cache'''
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = UserCache(maxsize=2, ttl=60)
+        cache.set('a', 'user a')
+        cache.set('b', 'user b')
+        cache.get('a')
+        cache.set('c', 'user c')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'user a')
+
+    @patch('accounts.authentication.time.monotonic')
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        cache = UserCache(maxsize=2, ttl=60)
+        mock_monotonic.return_value = 100
+        cache.set('a', 'user a')
+        mock_monotonic.return_value = 161
+        self.assertIsNone(cache.get('a'))
+
+
+class ThrottlingTest(TestCase):
+    '''test the cache backed rate limiter'''
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('accounts.throttling.time.time', return_value=1000.0)
+    def test_hit_refuses_over_limit(self, mock_time):
+        '''test: hits beyond the limit in one window are refused'''
+        self.assertEqual([hit('k', 2, 100) for _ in range(3)], [True, True, False])
+        self.assertTrue(hit('other', 2, 100))
+
+    @patch('accounts.throttling.time.time')
+    def test_previous_window_weighs_by_overlap(self, mock_time):
+        '''test: hits of the previous window count for the part still overlapping'''
+        mock_time.return_value = 1000.0
+        hit('k', 2, 100)
+        hit('k', 2, 100)
+        mock_time.return_value = 1150.0  # half of the previous window overlaps
+        self.assertTrue(hit('k', 2, 100))
+        self.assertFalse(hit('k', 2, 100))
+        mock_time.return_value = 1210.0
+        self.assertTrue(hit('k', 2, 100))
+
+    def test_claim_until_released(self):
+        '''test: a key can be claimed once until it is released'''
+        self.assertTrue(claim('k', 60))
+        self.assertFalse(claim('k', 60))
+        release('k')
+        self.assertTrue(claim('k', 60))
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase, override_settings
+
+from accounts.checks import check_signed_token_cache, check_throttling_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+MEMCACHED = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': '127.0.0.1:11211',
+}}
+
+
+class ThrottlingCacheCheckTest(SimpleTestCase):
+
+    @override_settings(CACHES=LOCMEM)
+    def test_per_process_cache_is_an_error(self):
+        errors = check_throttling_cache(None)
+        self.assertEqual([error.id for error in errors], ['accounts.E001'])
+
+    @override_settings(CACHES=MEMCACHED)
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_throttling_cache(None), [])
+
+
+class SignedTokenCacheCheckTest(SimpleTestCase):
+
+    @override_settings(CACHES=dict(MEMCACHED, login_tokens=LOCMEM['default']),
+                       LOGIN_TOKEN_MODE='signed')
+    def test_signed_tokens_with_per_process_token_cache_is_an_error(self):
+        errors = check_signed_token_cache(None)
+        self.assertEqual([error.id for error in errors], ['accounts.E002'])
+
+    @override_settings(CACHES=dict(LOCMEM, login_tokens=MEMCACHED['default']),
+                       LOGIN_TOKEN_MODE='signed')
+    def test_signed_tokens_with_shared_token_cache_pass(self):
+        self.assertEqual(check_signed_token_cache(None), [])
+
+    @override_settings(CACHES=dict(LOCMEM, login_tokens=LOCMEM['default']),
+                       LOGIN_TOKEN_MODE='db')
+    def test_database_tokens_need_no_shared_cache(self):
+        self.assertEqual(check_signed_token_cache(None), [])
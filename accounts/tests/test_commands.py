@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core import mail
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Token, QueuedEmail
+
+
+class PurgeTokensTest(TestCase):
+    '''test purge of stale tokens'''
+
+    def test_deletes_used_and_expired_tokens_only(self):
+        expired = timezone.now() - timedelta(days=2)
+        for i in range(3):
+            Token.objects.create(email='old@b.com', created=expired)
+        Token.objects.create(email='used@b.com', used=True)
+        fresh = Token.objects.create(email='fresh@b.com')
+
+        out = StringIO()
+        call_command('purge_tokens', batch_size=2, pause=0, stdout=out)
+
+        self.assertIn('Deleted 4 tokens', out.getvalue())
+        self.assertEqual(list(Token.objects.all()), [fresh])
+
+
+class CleanupDatabaseTest(TestCase):
+    '''test batched cleanup of sessions and tokens'''
+
+    def create_session(self, expire_date):
+        session = SessionStore()
+        session['data'] = 'value'
+        session.create()
+        Session.objects.filter(pk=session.session_key).update(expire_date=expire_date)
+        return session.session_key
+
+    def test_deletes_expired_sessions_and_stale_tokens(self):
+        for i in range(3):
+            self.create_session(timezone.now() - timedelta(days=1))
+        live = self.create_session(timezone.now() + timedelta(days=1))
+        Token.objects.create(email='used@b.com', used=True)
+        fresh = Token.objects.create(email='fresh@b.com')
+
+        out = StringIO()
+        call_command('cleanup_database', batch_size=2, pause=0, stdout=out)
+
+        self.assertIn('Deleted 3 sessions', out.getvalue())
+        self.assertIn('Deleted 1 tokens', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), [live])
+        self.assertEqual(list(Token.objects.all()), [fresh])
+
+    def test_analyze_and_vacuum(self):
+        out, err = StringIO(), StringIO()
+        call_command('cleanup_database', analyze=True, vacuum=True, stdout=out, stderr=err)
+        self.assertIn('Analyzed', out.getvalue())
+        self.assertIn('Skipped vacuum', err.getvalue())
+
+
+class SendQueuedEmailsTest(TestCase):
+    '''test outbox worker'''
+
+    def queue_email(self, to='edith@example.com'):
+        return QueuedEmail.objects.create(
+            to=to, subject='subject', body='body', from_email='noreplay@superlists'
+        )
+
+    def test_sends_and_removes_queued_emails(self):
+        self.queue_email('a@b.com')
+        self.queue_email('c@d.com')
+        out = StringIO()
+        call_command('send_queued_emails', stdout=out)
+        self.assertEqual([email.to for email in mail.outbox], [['a@b.com'], ['c@d.com']])
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertIn('Sent 2 emails', out.getvalue())
+
+    @patch('accounts.management.commands.send_queued_emails.get_connection')
+    def test_uses_one_connection_per_batch(self, mock_get_connection):
+        for i in range(3):
+            self.queue_email()
+        call_command('send_queued_emails', batch_size=2, stdout=StringIO())
+        self.assertEqual(mock_get_connection.call_count, 2)
+        self.assertEqual(mock_get_connection.return_value.open.call_count, 2)
+
+    @patch('accounts.management.commands.send_queued_emails.get_connection')
+    def test_failed_email_is_retried_later_with_backoff(self, mock_get_connection):
+        mock_get_connection.return_value.send_messages.side_effect = OSError('smtp down')
+        email = self.queue_email()
+        call_command('send_queued_emails', backoff=10, stdout=StringIO())
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('smtp down', email.last_error)
+        self.assertGreater(email.next_attempt, timezone.now() + timedelta(seconds=5))
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue_email()
+        QueuedEmail.objects.update(attempts=5)
+        call_command('send_queued_emails', max_attempts=5, stdout=StringIO())
+        self.assertEqual(mail.outbox, [])
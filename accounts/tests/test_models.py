@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
 from django.contrib import auth
 from django.contrib.auth import get_user_model
 from accounts.models import Token
@@ -33,4 +37,17 @@ class TokenModelTest(TestCase):
     def test_links_user_with_auto_generated_uid(self):
         token1 = Token.objects.create(email='a@b.com')
         token2 = Token.objects.create(email='a@b.com')
-        self.assertNotEqual(token1.uid, token2.uid)
\ No newline at end of file
+        self.assertNotEqual(token1.uid, token2.uid)
+
+    def test_uid_is_unique(self):
+        token = Token.objects.create(email='a@b.com')
+        with self.assertRaises(IntegrityError):
+            Token.objects.create(email='c@d.com', uid=token.uid)
+
+    def test_valid_excludes_used_and_expired_tokens(self):
+        fresh = Token.objects.create(email='a@b.com')
+        Token.objects.create(email='a@b.com', used=True)
+        Token.objects.create(
+            email='a@b.com', created=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(list(Token.objects.valid()), [fresh])
@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+from django.core import signing
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from accounts.models import QueuedEmail, Token
+from accounts.tokens import issue_token, redeem_token
+
+
+class DatabaseTokenTest(TestCase):
+    '''test tokens kept in the Token table'''
+
+    def test_issue_creates_token(self):
+        uid = issue_token('edith@example.com')
+        self.assertEqual(Token.objects.get(uid=uid).email, 'edith@example.com')
+
+    def test_redeem_returns_email_once(self):
+        uid = issue_token('edith@example.com')
+        self.assertEqual(redeem_token(uid), 'edith@example.com')
+        self.assertIsNone(redeem_token(uid))
+
+
+@override_settings(LOGIN_TOKEN_MODE='signed')
+class SignedTokenTest(TestCase):
+    '''test tokens signed into the login link'''
+
+    def setUp(self):
+        caches['login_tokens'].clear()
+
+    def test_issue_and_redeem_without_database(self):
+        '''test: signed tokens never touch the database'''
+        with self.assertNumQueries(0):
+            uid = issue_token('edith@example.com')
+            self.assertEqual(redeem_token(uid), 'edith@example.com')
+
+    def test_tokens_are_single_use(self):
+        uid = issue_token('edith@example.com')
+        redeem_token(uid)
+        self.assertIsNone(redeem_token(uid))
+
+    def test_tokens_for_same_email_differ(self):
+        self.assertNotEqual(
+            issue_token('edith@example.com'), issue_token('edith@example.com')
+        )
+
+    def test_tampered_token_is_refused(self):
+        uid = issue_token('edith@example.com')
+        payload, rest = uid.split(':', 1)
+        forged = signing.b64_encode(b'["mallory@example.com","x"]').decode()
+        self.assertIsNone(redeem_token(f'{forged}:{rest}'))
+        self.assertIsNone(redeem_token('no-such-token'))
+
+    def test_expired_token_is_refused(self):
+        with patch('django.core.signing.time.time', return_value=0):
+            uid = issue_token('edith@example.com')
+        self.assertIsNone(redeem_token(uid))
+
+    def test_login_through_link(self):
+        '''test: the emailed link logs the user in'''
+        self.client.post('/accounts/send_login_email', data={'email': 'edith@example.com'})
+        self.assertEqual(Token.objects.count(), 0)
+        body = QueuedEmail.objects.get().body
+        self.client.get(body[body.index('/accounts/login'):].strip())
+        self.assertEqual(self.client.session['_auth_user_id'], 'edith@example.com')
@@ -1,30 +1,40 @@
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from unittest.mock import patch, call
 
 import accounts.views
-from accounts.models import Token
+from accounts.models import Token, QueuedEmail
 
 
 class SendLoginEmailViewTest(TestCase):
 
+    def setUp(self):
+        cache.clear()
+
     def test_redirects_to_home_page(self):
         '''test: redirects to home page'''
         response = self.client.post('/accounts/send_login_email', data={
             'email': 'edith@example.com'})
         self.assertRedirects(response, '/')
 
-    @patch('accounts.views.send_mail')
-    def test_sand_mail_to_address_from_post(self, mock_send_mail):
-        '''test: send meessage to address from post'''
+    def test_queues_mail_to_address_from_post(self):
+        '''test: queue meessage to address from post'''
         self.client.post('/accounts/send_login_email', data={
             'email': 'edith@example.com'
         })
 
-        self.assertEqual(mock_send_mail.called, True)
-        (subject, body, from_email, to_list), kwargs = mock_send_mail.call_args
-        self.assertEqual(subject, 'Your login link for Superlists')
-        self.assertEqual(from_email, 'noreplay@superlists')
-        self.assertEqual(to_list, ['edith@example.com'])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.subject, 'Your login link for Superlists')
+        self.assertEqual(email.from_email, 'noreplay@superlists')
+        self.assertEqual(email.to, 'edith@example.com')
+
+    def test_does_not_send_mail_during_request(self):
+        '''test: sending is left to the outbox worker'''
+        self.client.post('/accounts/send_login_email', data={
+            'email': 'edith@example.com'
+        })
+        self.assertEqual(mail.outbox, [])
 
     def test_adds_success_message(self):
         '''test: adds success message'''
@@ -45,15 +55,13 @@ class SendLoginEmailViewTest(TestCase):
         token = Token.objects.first()
         self.assertEqual(token.email, 'edith@example.com')
 
-    @patch('accounts.views.send_mail')
-    def test_sends_link_to_login_using_token_uid(self, mock_send_mail):
+    def test_sends_link_to_login_using_token_uid(self):
         '''test: send link to login using token uid'''
         self.client.post('/accounts/send_login_email', data={'email': 'edith@example.com'})
 
         token = Token.objects.first()
         expected_url = f'http://testserver/accounts/login?token={token.uid}'
-        (subject, body, from_email, to_list), kwards = mock_send_mail.call_args
-        self.assertIn(expected_url, body)
+        self.assertIn(expected_url, QueuedEmail.objects.get().body)
 
 
 @patch('accounts.views.auth')
@@ -85,4 +93,55 @@ class LoginViewTest(TestCase):
         '''test: does not login if user is not authenticated'''
         mock_auth.authenticate.return_value = None
         self.client.get('/accounts/login?token=abcd123')
-        self.assertFalse(mock_auth.login.called)
\ No newline at end of file
+        self.assertFalse(mock_auth.login.called)
+
+
+class SendLoginEmailThrottlingTest(TestCase):
+    '''test rate limiting and coalescing of login emails'''
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, email='edith@example.com', ip='10.0.0.1'):
+        return self.client.post(
+            '/accounts/send_login_email', data={'email': email},
+            follow=True, HTTP_X_REAL_IP=ip
+        )
+
+    def test_repeated_request_reuses_pending_link(self):
+        '''test: repeated request within the window queues no new email'''
+        self.post()
+        response = self.post()
+        self.assertEqual(Token.objects.count(), 1)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+        message = list(response.context['messages'])[0]
+        self.assertEqual(message.tags, 'success')
+
+    def test_new_link_can_be_sent_after_login(self):
+        '''test: once the pending link is used a new one can be requested'''
+        self.post()
+        self.client.get(f'/accounts/login?token={Token.objects.get().uid}')
+        self.post()
+        self.assertEqual(Token.objects.count(), 2)
+
+    @override_settings(LOGIN_EMAIL_RATE_LIMIT_PER_EMAIL=(2, 3600))
+    def test_limits_requests_per_email(self):
+        '''test: too many requests for one address are refused'''
+        self.post(ip='10.0.0.1')
+        self.post(ip='10.0.0.2')
+        response = self.post(ip='10.0.0.3')
+        message = list(response.context['messages'])[0]
+        self.assertEqual(message.tags, 'warning')
+        self.assertIn('Too many login requests', message.message)
+
+    @override_settings(LOGIN_EMAIL_RATE_LIMIT_PER_IP=(2, 3600))
+    def test_limits_requests_per_client_ip(self):
+        '''test: too many requests from one client are refused'''
+        self.post(email='a@example.com')
+        self.post(email='b@example.com')
+        self.post(email='c@example.com')
+        self.post(email='d@example.com', ip='10.0.0.2')
+        self.assertEqual(
+            sorted(QueuedEmail.objects.values_list('to', flat=True)),
+            ['a@example.com', 'b@example.com', 'd@example.com']
+        )
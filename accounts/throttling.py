@@ -0,0 +1,57 @@
+'''request throttling state kept in the default Django cache
+
+every gunicorn worker only sees the same counts when that cache is shared,
+i.e. memcached through MEMCACHED_LOCATION. With the local memory cache each
+worker counts on its own, so limits are multiplied by the number of workers
+and reset when one is recycled; check --deploy reports that as an error.
+'''
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# backends that keep nothing other processes can see
+UNSHARED_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] not in UNSHARED_CACHE_BACKENDS
+
+
+def _cache_key(prefix, key):
+    return f'{prefix}:{hashlib.sha1(key.encode()).hexdigest()}'
+
+
+def hit(key, limit, window):
+    '''count a hit for key, False if it already had limit hits in the last window seconds
+
+    the sliding window is approximated from the current and the previous
+    fixed window, the previous one weighted by how much it still overlaps
+    '''
+    now = time.time()
+    slot = int(now // window)
+    overlap = 1 - (now % window) / window
+    current_key = _cache_key(f'ratelimit:{slot}', key)
+    previous_key = _cache_key(f'ratelimit:{slot - 1}', key)
+    counts = cache.get_many([current_key, previous_key])
+    if counts.get(previous_key, 0) * overlap + counts.get(current_key, 0) >= limit:
+        return False
+    cache.add(current_key, 0, timeout=window * 2)
+    try:
+        cache.incr(current_key)
+    except ValueError:  # expired between add and incr
+        cache.set(current_key, 1, timeout=window * 2)
+    return True
+
+
+def claim(key, window):
+    '''True for the first claim of key in window seconds, until released'''
+    return cache.add(_cache_key('claim', key), True, timeout=window)
+
+
+def release(key):
+    cache.delete(_cache_key('claim', key))
@@ -0,0 +1,62 @@
+'''issuing and redeeming the tokens carried by login links
+
+LOGIN_TOKEN_MODE selects where a token lives:
+
+- 'db': a Token row, created when the link is sent and marked used on login
+- 'signed': the link carries the email, a nonce and a timestamp signed with
+  SECRET_KEY, checked without touching the database. Redeemed tokens are
+  remembered in the login_tokens cache until they would have expired anyway,
+  so the replay store never holds more than one token lifetime of logins.
+  That cache must be shared by every worker and must not evict, so the
+  accounts.E002 check refuses this mode without LOGIN_TOKEN_CACHE_LOCATION.
+'''
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from accounts.models import Token
+
+SIGNING_SALT = 'accounts.login-token'
+USED_TOKEN_CACHE = 'login_tokens'
+
+
+def signed_mode():
+    return getattr(settings, 'LOGIN_TOKEN_MODE', 'db') == 'signed'
+
+
+def issue_token(email):
+    '''token to put in the login link sent to email'''
+    if signed_mode():
+        return signing.dumps([email, get_random_string(8)], salt=SIGNING_SALT)
+    return str(Token.objects.create(email=email).uid)
+
+
+def redeem_token(uid):
+    '''email the token was issued to, or None if it is unknown, expired or used'''
+    if signed_mode():
+        return _redeem_signed(uid)
+    with transaction.atomic():
+        token = Token.objects.valid().filter(uid=uid).first()
+        if token is None:
+            return None
+        if not Token.objects.filter(pk=token.pk, used=False).update(used=True):
+            return None  # redeemed by a concurrent request
+    return token.email
+
+
+def _redeem_signed(uid):
+    try:
+        email, _ = signing.loads(
+            str(uid), salt=SIGNING_SALT, max_age=settings.LOGIN_TOKEN_TTL
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+    used_key = 'used-login-token:' + hashlib.sha1(str(uid).encode()).hexdigest()
+    # a full cache refuses the add too, which refuses the login rather than risk a replay
+    if not caches[USED_TOKEN_CACHE].add(used_key, True, timeout=settings.LOGIN_TOKEN_TTL):
+        return None
+    return email
@@ -1,31 +1,49 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.core.urlresolvers import reverse
-from django.core.mail import send_mail
 from django.contrib import messages
 from django.contrib import auth
 
-from accounts.models import Token
+from accounts.authentication import pending_login_key
+from accounts.models import QueuedEmail
+from accounts.throttling import claim, hit
+from accounts.tokens import issue_token
+
+LOGIN_EMAIL_SENT_MESSAGE = (
+    'Check your email, you`ll find a message with a link '
+    'that will log you into the site.'
+)
+
+
+def client_ip(request):
+    '''address of the client, as reported by nginx when behind it'''
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR', '')
 
 
 def send_login_email(request):
-    '''send email for login in system'''
+    '''queue email for login in system, sent by the send_queued_emails worker'''
     email = request.POST['email']
-    token = Token.objects.create(email=email)
+    if not (hit(f'login-email:{email}', *settings.LOGIN_EMAIL_RATE_LIMIT_PER_EMAIL)
+            and hit(f'login-ip:{client_ip(request)}', *settings.LOGIN_EMAIL_RATE_LIMIT_PER_IP)):
+        messages.warning(request, 'Too many login requests, please try again later.')
+        return redirect('/')
+    if not claim(pending_login_key(email), settings.LOGIN_EMAIL_COALESCE_WINDOW):
+        # a link that is still valid was sent moments ago
+        messages.success(request, LOGIN_EMAIL_SENT_MESSAGE)
+        return redirect('/')
     url = request.build_absolute_uri(
-        reverse('login') + '?token=' + str(token.uid)
+        reverse('login') + '?' + urlencode({'token': issue_token(email)})
     )
     message_body = f'Use this link to log in:\n\n{url}'
-    send_mail(
-        'Your login link for Superlists',
-        message_body,
-        'noreplay@superlists',
-        [email]
-    )
-    messages.success(
-        request,
-        'Check your email, you`ll find a message with a link '
-        'that will log you into the site.'
+    QueuedEmail.objects.create(
+        subject='Your login link for Superlists',
+        body=message_body,
+        from_email='noreplay@superlists',
+        to=email
     )
+    messages.success(request, LOGIN_EMAIL_SENT_MESSAGE)
     return redirect('/')
 
 
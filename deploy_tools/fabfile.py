@@ -1,19 +1,23 @@
-from fabric.contrib.files import append, exists, sed
-from fabric.api import env, local, run
+from fabric.contrib.files import append, contains, exists, sed
+from fabric.api import env, local, run, sudo
 import random
 
 REPO_URL = 'https://github.com/Dimedresku/TDD_study_project.git'
 
 
-def deploy(host):
+def deploy(host, cache_mb=64):
     site_folder = f'/home/{env.user}/sites/{host}'
     source_folder = site_folder + '/source'
     _create_directory_structure_if_necessary(site_folder)
     _get_latest_source(source_folder)
     _update_settings(source_folder, host)
     _update_virtualenv(source_folder)
+    _update_memcached(cache_mb)
+    _update_login_token_memcached()
     _update_static_files(source_folder)
     _update_database(source_folder)
+    _update_gunicorn_service(source_folder, host)
+    _update_email_worker_service(source_folder, host)
 
 
 def _create_directory_structure_if_necessary(site_folder):
@@ -49,6 +53,26 @@ def _update_virtualenv(source_folder):
     run(f'{virtualenv_folder}/bin/pip3.8 install -r {source_folder}/requirements.txt')
 
 
+def _update_memcached(cache_mb):
+    if not exists('/usr/bin/memcached'):
+        sudo('apt-get install -y memcached')
+    sudo('systemctl enable --now memcached')
+    # a restart empties the cache, including sessions and login throttling
+    if not contains('/etc/memcached.conf', f'-m {cache_mb}', exact=True):
+        sed('/etc/memcached.conf', '^-m .*$', f'-m {cache_mb}', use_sudo=True)
+        sudo('systemctl restart memcached')
+
+
+def _update_login_token_memcached():
+    # a second instance only for used login tokens: -M refuses writes when
+    # full instead of evicting, and it is never restarted here, since either
+    # would let a used login link be replayed
+    config = '/etc/memcached_logintokens.conf'
+    if not exists(config):
+        sudo(f'printf -- "-u memcache\\n-l 127.0.0.1\\n-p 11212\\n-m 16\\n-M\\n" > {config}')
+    sudo('systemctl enable --now memcached@logintokens')
+
+
 def _update_static_files(source_folder):
     run(f'cd {source_folder} && ../virtualenv/bin/python3.8 manage.py collectstatic --noinput')
 
@@ -56,3 +80,23 @@ def _update_static_files(source_folder):
 def _update_database(source_folder):
     run(f'cd {source_folder} && ../virtualenv/bin/python3.8 manage.py makemigrations --noinput '
         '&& ../virtualenv/bin/python3.8 manage.py migrate --noinput')
+
+
+def _update_gunicorn_service(source_folder, site_name):
+    run(f'cd {source_folder} && ../virtualenv/bin/gunicorn --check-config '
+        '--config python:superlists.gunicorn_config superlists.wsgi:application')
+    service = f'/etc/systemd/system/gunicorn-{site_name}.service'
+    sudo(f'sed "s/SITENAME/{site_name}/g" '
+         f'{source_folder}/deploy_tools/gunicorn-systemd.template.service > {service}')
+    sudo('systemctl daemon-reload')
+    sudo(f'systemctl enable gunicorn-{site_name}')
+    sudo(f'systemctl restart gunicorn-{site_name}')
+
+
+def _update_email_worker_service(source_folder, site_name):
+    service = f'/etc/systemd/system/email-worker-{site_name}.service'
+    sudo(f'sed "s/SITENAME/{site_name}/g" '
+         f'{source_folder}/deploy_tools/email-worker-systemd.template.service > {service}')
+    sudo('systemctl daemon-reload')
+    sudo(f'systemctl enable email-worker-{site_name}')
+    sudo(f'systemctl restart email-worker-{site_name}')
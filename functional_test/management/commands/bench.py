@@ -0,0 +1,225 @@
+import json
+import time
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment)
+
+from accounts.models import QueuedEmail
+from functional_test.management.commands.create_session import (
+    create_pre_authenticated_session)
+from lists.models import List
+
+User = get_user_model()
+
+HEAVY_OWNER = 'heavy@example.com'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the main request paths in-process against a generated dataset '
+        'in a throwaway test database and report latency percentiles as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=200,
+                            help='lists owned by the heavy owner')
+        parser.add_argument('--items', type=int, default=5,
+                            help='items in each ordinary list')
+        parser.add_argument('--huge-list-items', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='run only these scenarios (repeatable)')
+        parser.add_argument('--session-profile', choices=sorted(settings.SESSION_PROFILES),
+                            help='session storage to bench instead of SESSION_PROFILE')
+        parser.add_argument('--output', help='also write the report to this file')
+        parser.add_argument('--baseline', help='compare with a saved report')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='allowed p95 slowdown against the baseline')
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios()
+        selected = options['scenarios'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+        session_engine = settings.SESSION_ENGINE
+        if options['session_profile']:
+            session_engine = settings.SESSION_PROFILES[options['session_profile']]
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with isolated_settings(SESSION_ENGINE=session_engine):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                self.dataset = self.create_dataset(options)
+                results = {
+                    name: self.run_scenario(scenarios[name], options['iterations'])
+                    for name in selected
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'dataset': {
+                key: options[key] for key in ('lists', 'items', 'huge_list_items')
+            },
+            'session_engine': session_engine,
+            'scenarios': results,
+        }
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            report['comparison'], regressions = compare(
+                results, baseline['scenarios'], options['tolerance']
+            )
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+        if regressions:
+            raise CommandError(f'performance regressions: {", ".join(regressions)}')
+
+    def create_dataset(self, options):
+        owner = User.objects.create(email=HEAVY_OWNER)
+        texts = [f'item {i}' for i in range(options['items'])]
+        for i in range(options['lists']):
+            list_ = List.objects.create(owner=owner)
+            list_.add_items([f'list {i}'] + texts)
+        small_list = List.create_new(first_item_text='small list')
+        huge_list = List.create_new(first_item_text='huge list')
+        for start in range(0, options['huge_list_items'], 1000):
+            stop = min(start + 1000, options['huge_list_items'])
+            huge_list.add_items([f'huge item {i}' for i in range(start, stop)])
+        return {'small_list': small_list, 'huge_list': huge_list}
+
+    def scenarios(self):
+        unique = count()
+
+        def home(client):
+            return client.get('/')
+
+        def new_list(client):
+            return client.post('/lists/new', {'text': f'new list {next(unique)}'})
+
+        def add_item(client):
+            url = self.dataset['small_list'].get_absolute_url()
+            return client.post(url, {'text': f'new item {next(unique)}'})
+
+        def view_small_list(client):
+            return client.get(self.dataset['small_list'].get_absolute_url())
+
+        def view_huge_list(client):
+            return client.get(self.dataset['huge_list'].get_absolute_url())
+
+        def my_lists_heavy_owner(client):
+            return client.get(f'/lists/users/{HEAVY_OWNER}/')
+
+        def home_logged_in(client):
+            if settings.SESSION_COOKIE_NAME not in client.cookies:
+                client.cookies[settings.SESSION_COOKIE_NAME] = (
+                    create_pre_authenticated_session(f'session{next(unique)}@example.com')
+                )
+            return client.get('/')
+
+        def login_flow(client):
+            n = next(unique)
+            email = f'user{n}@example.com'
+            # a different address each time, so the per IP rate limit stays out of the way
+            client.post('/accounts/send_login_email', {'email': email},
+                        REMOTE_ADDR=f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}')
+            body = QueuedEmail.objects.filter(to=email).latest('id').body
+            response = client.get(body[body.index('/accounts/login'):].strip())
+            client.logout()
+            return response
+
+        return {
+            'home': home,
+            'new_list': new_list,
+            'add_item': add_item,
+            'view_small_list': view_small_list,
+            'view_huge_list': view_huge_list,
+            'my_lists_heavy_owner': my_lists_heavy_owner,
+            'home_logged_in': home_logged_in,
+            'login_flow': login_flow,
+        }
+
+    def run_scenario(self, scenario, iterations):
+        client = Client()
+        scenario(client)  # warm up caches and lazy imports
+        timings, queries, writes = [], [], []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = scenario(client)
+                timings.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                raise CommandError(f'{scenario.__name__} returned {response.status_code}')
+            queries.append(len(captured))
+            writes.append(sum(
+                query['sql'].lstrip().upper().startswith(WRITE_STATEMENTS)
+                for query in captured.captured_queries
+            ))
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            'iterations': iterations,
+            'p50_ms': percentile(timings, 50) * 1000,
+            'p95_ms': percentile(timings, 95) * 1000,
+            'p99_ms': percentile(timings, 99) * 1000,
+            'throughput_rps': iterations / elapsed,
+            'queries_per_request': sum(queries) / iterations,
+            'writes_per_request': sum(writes) / iterations,
+        }
+
+
+def isolated_settings(**overrides):
+    '''settings that keep the benchmark away from what a live deploy shares
+
+    that is its memcached, which holds sessions, login throttling and used
+    login tokens, and its database replicas
+    '''
+    return override_settings(
+        DATABASE_REPLICAS=[],
+        CACHES={
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': f'bench-{alias}'}
+            for alias in settings.CACHES
+        },
+        **overrides
+    )
+
+
+def percentile(sorted_values, percent):
+    '''nearest-rank percentile of an already sorted list'''
+    rank = max(1, int(round(percent / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def compare(results, baseline, tolerance):
+    '''p95 and query count changes against the baseline, with regressed names'''
+    comparison, regressions = {}, []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        p95_ratio = result['p95_ms'] / before['p95_ms'] if before['p95_ms'] else 1.0
+        query_delta = result['queries_per_request'] - before['queries_per_request']
+        comparison[name] = {'p95_ratio': p95_ratio, 'queries_delta': query_delta}
+        if p95_ratio > 1 + tolerance or query_delta > 0:
+            regressions.append(name)
+    return comparison, regressions
@@ -0,0 +1,186 @@
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from functional_test.management.commands.bench import percentile
+
+DATABASE_PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure read and write throughput over HTTP with several concurrent '
+        'clients, against gunicorn servers started on a throwaway database '
+        'or against an already running server'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='bench this running server instead of starting one')
+        parser.add_argument('--workers', type=int, action='append',
+                            help='gunicorn worker counts to compare (repeatable)')
+        parser.add_argument('--gunicorn-args', action='append', dest='configurations',
+                            help='gunicorn arguments to compare instead of worker counts, '
+                                 'e.g. "-c python:superlists.gunicorn_config" (repeatable)')
+        parser.add_argument('--database-profile', action='append', dest='profiles',
+                            choices=DATABASE_PROFILES,
+                            help='DATABASE_PROFILE values to compare (repeatable)')
+        parser.add_argument('--gunicorn',
+                            default=os.path.join(os.path.dirname(sys.executable), 'gunicorn'))
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--clients', type=int, default=16,
+                            help='concurrent client threads')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='seconds of load per run')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='share of requests that add an item')
+        parser.add_argument('--seed-items', type=int, default=200,
+                            help='items in the list being read')
+        parser.add_argument('--output', help='also write the report to this file')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            runs = [self.run_load(options['url'].rstrip('/'), options)]
+        else:
+            runs = []
+            configurations = options['configurations'] or [
+                f'--workers {workers}' for workers in options['workers'] or [1, 4]
+            ]
+            for profile in options['profiles'] or list(DATABASE_PROFILES):
+                for configuration in configurations:
+                    result = self.run_server(profile, shlex.split(configuration), options)
+                    result.update(database_profile=profile, gunicorn_args=configuration)
+                    runs.append(result)
+        output = json.dumps({'runs': runs}, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
+
+    def run_server(self, profile, gunicorn_args, options):
+        '''start gunicorn on a fresh database, load it, then stop it'''
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ, DATABASE_PROFILE=profile,
+                DATABASE_NAME=os.path.join(directory, 'db.sqlite3'),
+            )
+            subprocess.run(
+                [sys.executable, 'manage.py', 'migrate', '--noinput', '-v0'],
+                cwd=settings.BASE_DIR, env=env, check=True
+            )
+            url = f'http://127.0.0.1:{options["port"]}'
+            server = subprocess.Popen(
+                [options['gunicorn'], *gunicorn_args,
+                 '--bind', f'127.0.0.1:{options["port"]}', 'superlists.wsgi:application'],
+                cwd=settings.BASE_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_until_up(url, server)
+                return self.run_load(url, options)
+            finally:
+                server.terminate()
+                server.wait()
+
+    def run_load(self, url, options):
+        list_url = create_list(url, options['seed_items'])
+        bulk_url = list_url + 'items/bulk'
+        results = {'read': [], 'write': []}
+        errors = []
+        lock = threading.Lock()
+        deadline = time.time() + options['duration']
+
+        def client(number):
+            chooser = random.Random(number)
+            sequence = 0
+            while time.time() < deadline:
+                sequence += 1
+                if chooser.random() < options['write_ratio']:
+                    kind = 'write'
+                    body = json.dumps({'items': [f'client {number} item {sequence}']})
+                    request = urllib.request.Request(
+                        bulk_url, data=body.encode(),
+                        headers={'Content-Type': 'application/json'}
+                    )
+                else:
+                    kind, request = 'read', urllib.request.Request(list_url)
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request) as response:
+                        response.read()
+                except (urllib.error.URLError, ConnectionError) as e:
+                    with lock:
+                        errors.append(f'{kind}: {e}')
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    results[kind].append(elapsed)
+
+        threads = [
+            threading.Thread(target=client, args=(number,))
+            for number in range(options['clients'])
+        ]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+
+        report = {'clients': options['clients'], 'errors': len(errors)}
+        for kind, timings in results.items():
+            timings.sort()
+            report[kind] = {
+                'requests': len(timings),
+                'throughput_rps': len(timings) / elapsed,
+                'p50_ms': percentile(timings, 50) * 1000 if timings else None,
+                'p95_ms': percentile(timings, 95) * 1000 if timings else None,
+            }
+        if errors:
+            report['first_error'] = errors[0]
+        return report
+
+
+def wait_until_up(url, server, timeout=15):
+    give_up = time.time() + timeout
+    while time.time() < give_up:
+        if server.poll() is not None:
+            raise CommandError(f'gunicorn exited with status {server.returncode}')
+        try:
+            urllib.request.urlopen(url + '/').close()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise CommandError(f'{url} did not come up in {timeout}s')
+
+
+def create_list(url, items):
+    '''new list filled with items, returns its absolute url'''
+    cookies = CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    opener.open(url + '/').close()
+    csrf_token = next(
+        cookie.value for cookie in cookies if cookie.name == settings.CSRF_COOKIE_NAME
+    )
+    form = urllib.parse.urlencode({'text': 'bench list', 'csrfmiddlewaretoken': csrf_token})
+    with opener.open(url + '/lists/new', data=form.encode()) as response:
+        list_url = response.geturl()
+    for start in range(0, items, 500):
+        body = json.dumps({'items': [f'item {i}' for i in range(start, min(start + 500, items))]})
+        opener.open(urllib.request.Request(
+            list_url + 'items/bulk', data=body.encode(),
+            headers={'Content-Type': 'application/json'}
+        )).close()
+    return list_url
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from functional_test.management.commands.bench import compare, isolated_settings, percentile
+from superlists.routers import live_replicas
+
+
+class BenchTest(SimpleTestCase):
+    '''test the in-process benchmark command'''
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_compare_flags_slower_p95_and_extra_queries(self):
+        baseline = {
+            'home': {'p95_ms': 10.0, 'queries_per_request': 2},
+            'add_item': {'p95_ms': 10.0, 'queries_per_request': 5},
+            'new_list': {'p95_ms': 10.0, 'queries_per_request': 5},
+        }
+        results = {
+            'home': {'p95_ms': 11.0, 'queries_per_request': 2},
+            'add_item': {'p95_ms': 13.0, 'queries_per_request': 5},
+            'new_list': {'p95_ms': 9.0, 'queries_per_request': 6},
+            'login_flow': {'p95_ms': 50.0, 'queries_per_request': 9},
+        }
+        comparison, regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(sorted(regressions), ['add_item', 'new_list'])
+        self.assertEqual(comparison['home'], {'p95_ratio': 1.1, 'queries_delta': 0})
+        self.assertNotIn('login_flow', comparison)
+
+    def test_isolated_from_shared_caches_and_replicas(self):
+        memcached = {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+                     'LOCATION': '127.0.0.1:11211'}
+        with self.settings(CACHES={'default': memcached}, DATABASE_REPLICAS=['replica1']):
+            with isolated_settings():
+                self.assertEqual(type(caches['default']).__name__, 'LocMemCache')
+                self.assertEqual(live_replicas(), [])
+
+    def test_smoke_run_on_small_dataset(self):
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'bench', '--lists', '2', '--items', '2',
+             '--huge-list-items', '20', '--iterations', '2',
+             '--scenario', 'home', '--scenario', 'view_huge_list',
+             '--scenario', 'login_flow'],
+            cwd=settings.BASE_DIR, env=dict(os.environ, MEMCACHED_LOCATION='127.0.0.1:1'),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+        )
+        report = json.loads(result.stdout)
+        self.assertEqual(
+            sorted(report['scenarios']), ['home', 'login_flow', 'view_huge_list']
+        )
+        self.assertEqual(report['scenarios']['home']['iterations'], 2)
@@ -1,4 +1,5 @@
 from django.core import mail
+from django.core.management import call_command
 from selenium.webdriver.common.keys import Keys
 import re
 
@@ -61,6 +62,7 @@ class LoginTest(FunctionalTest):
         import poplib
         import time
         if not self.staging_server:
+            call_command('send_queued_emails')
             email = mail.outbox[0]
             self.assertIn(test_email, email.to)
             self.assertEqual(email.subject, subject)
@@ -1,5 +1,7 @@
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from lists.models import Item, List
 
 EMPTY_ITEM_ERROR = "You can`t have an empty list item"
@@ -33,6 +35,8 @@ class ExistingListItemForm(ItemForm):
         self.instance.list = for_list
 
     def validate_unique(self):
+        if self.checks_duplicates_on_insert():
+            return
         try:
             self.instance.validate_unique()
         except ValidationError as e:
@@ -40,7 +44,20 @@ class ExistingListItemForm(ItemForm):
             self._update_errors(e)
 
     def save(self):
-        return forms.models.ModelForm.save(self)
+        '''save item; in constraint mode returns None and records error on duplicate'''
+        if not self.checks_duplicates_on_insert():
+            return forms.models.ModelForm.save(self)
+        try:
+            with transaction.atomic():
+                return forms.models.ModelForm.save(self)
+        except IntegrityError:
+            self.add_error('text', DUPLICATE_ITEM_ERROR)
+            return None
+
+    @staticmethod
+    def checks_duplicates_on_insert():
+        '''in 'constraint' mode the (list, text_hash) unique index rejects duplicates'''
+        return getattr(settings, 'LISTS_DUPLICATE_CHECK', 'select') == 'constraint'
 
 
 class NewListForm(ItemForm):
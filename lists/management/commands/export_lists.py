@@ -0,0 +1,77 @@
+import csv
+import json
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from lists.models import Item, List
+
+FIELDS = ('list', 'owner', 'text')
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream every list item with its list id and owner email as JSONL or CSV, '
+        'then one row without text for each list that has no items'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='output file, - for stdout')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            exported = write_items(self.stdout, options['format'], options['chunk_size'])
+        else:
+            with open(options['path'], 'w', newline='', encoding='utf-8') as f:
+                exported = write_items(f, options['format'], options['chunk_size'])
+        self.stderr.write(f'Exported {exported} items')
+
+
+def iter_items(chunk_size):
+    '''(list id, owner email, text) of every item in id order, chunk by chunk'''
+    last_id = 0
+    while True:
+        chunk = list(
+            Item.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'list_id', 'list__owner_id', 'text')[:chunk_size]
+        )
+        if not chunk:
+            return
+        for item_id, list_id, owner, text in chunk:
+            yield list_id, owner or '', text
+        last_id = chunk[-1][0]
+
+
+def iter_empty_lists(chunk_size):
+    '''(list id, owner email, None) of every list without items, chunk by chunk'''
+    last_id = 0
+    while True:
+        chunk = list(
+            List.objects.filter(id__gt=last_id, item__isnull=True).order_by('id')
+            .values_list('id', 'owner_id')[:chunk_size]
+        )
+        if not chunk:
+            return
+        for list_id, owner in chunk:
+            yield list_id, owner or '', None
+        last_id = chunk[-1][0]
+
+
+def write_items(stream, format, chunk_size):
+    '''write every row, returns the number of items among them'''
+    exported = 0
+    rows = chain(iter_items(chunk_size), iter_empty_lists(chunk_size))
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            exported += row[2] is not None
+    else:
+        for row in rows:
+            stream.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+            exported += row[2] is not None
+    return exported
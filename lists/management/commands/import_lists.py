@@ -0,0 +1,97 @@
+import csv
+import json
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from lists.models import Item, List, text_digest
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load lists and items written by export_lists, keeping their grouping '
+        'and order; rows without text become lists without items'
+    )
+
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='input file, - for stdin')
+        parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            imported = self.import_rows(read_rows(sys.stdin, options['format']), options)
+        else:
+            with open(options['path'], newline='', encoding='utf-8') as f:
+                imported = self.import_rows(read_rows(f, options['format']), options)
+        self.stdout.write(f'Imported {imported} items')
+
+    def import_rows(self, rows, options):
+        lists = {}
+        imported = 0
+        while True:
+            batch = list(islice(rows, options['batch_size']))
+            if not batch:
+                return imported
+            items = [row for row in batch if row['text']]
+            with transaction.atomic():
+                self.create_lists(batch, lists)
+                Item.objects.bulk_create(
+                    Item(list_id=lists[row['list']], text=row['text'],
+                         text_hash=text_digest(row['text']))
+                    for row in items
+                )
+                touched = sorted({lists[row['list']] for row in items})
+                for start in range(0, len(touched), List.LOOKUP_BATCH_SIZE):
+                    ids = touched[start:start + List.LOOKUP_BATCH_SIZE]
+                    List.objects.filter(id__in=ids).rebuild_summaries()
+            imported += len(items)
+
+    def create_lists(self, batch, lists):
+        '''create lists (and their owners) first seen in this batch, with bulk inserts'''
+        new_lists = {}
+        for row in batch:
+            if row['list'] not in lists:
+                new_lists.setdefault(row['list'], row['owner'] or None)
+        owners = sorted({owner for owner in new_lists.values() if owner})
+        existing = set()
+        for start in range(0, len(owners), List.LOOKUP_BATCH_SIZE):
+            emails = owners[start:start + List.LOOKUP_BATCH_SIZE]
+            existing.update(
+                User.objects.filter(email__in=emails).values_list('email', flat=True)
+            )
+        User.objects.bulk_create(User(email=email) for email in owners if email not in existing)
+        # SQLite does not return the ids of bulk inserted rows, so they are
+        # picked here; under TRANSACTION_MODE IMMEDIATE the import's transaction
+        # holds the write lock, so no other process can take them meanwhile
+        next_id = (List.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        List.objects.bulk_create(
+            List(id=next_id + number, owner_id=owner)
+            for number, owner in enumerate(new_lists.values())
+        )
+        for number, key in enumerate(new_lists):
+            lists[key] = next_id + number
+
+
+def read_rows(stream, format):
+    if format == 'csv':
+        for row in csv.DictReader(stream):
+            yield row
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise CommandError(f'line {number} is not valid JSON')
+        row['list'] = str(row['list'])
+        yield row
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lists.models import List
+
+
+class Command(BaseCommand):
+    help = 'Recompute name, item_count and last_modified of every list from its items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        start = time.time()
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                List.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                updated += List.objects.filter(
+                    id__gte=ids[0], id__lte=ids[-1]
+                ).rebuild_summaries()
+            last_id = ids[-1]
+        self.stdout.write(
+            f'Rebuilt {updated} list summaries in {time.time() - start:.2f}s'
+        )
@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over its read replicas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*',
+                            help='replicas to refresh, all of DATABASE_REPLICAS by default')
+        parser.add_argument('--pages', type=int, default=-1,
+                            help='pages copied per step, -1 copies everything in one step')
+        parser.add_argument('--loop', action='store_true',
+                            help='keep refreshing instead of exiting after one copy')
+        parser.add_argument('--interval', type=float, default=10,
+                            help='seconds between refreshes with --loop')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(f'not replicas: {", ".join(sorted(unknown))}')
+        if not aliases:
+            raise CommandError('no replicas configured, set DATABASE_REPLICAS')
+        while True:
+            for alias in aliases:
+                start = time.time()
+                refresh(settings.DATABASES['default']['NAME'],
+                        settings.DATABASES[alias]['NAME'], options['pages'])
+                self.stdout.write(f'Refreshed {alias} in {time.time() - start:.2f}s')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+
+def refresh(source_name, replica_name, pages=-1):
+    '''copy source over the replica with the SQLite online backup API
+
+    the copy is written into the live replica file, so connections the
+    workers keep open see the new data as soon as it is committed
+    '''
+    source = sqlite3.connect(source_name)
+    replica = sqlite3.connect(replica_name, timeout=30)
+    try:
+        source.backup(replica, pages=pages)
+    finally:
+        replica.close()
+        source.close()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 12:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_list_summaries(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    Item = apps.get_model('lists', 'Item')
+    items = Item.objects.filter(list=OuterRef('pk')).order_by()
+    List.objects.update(
+        name=Coalesce(Subquery(items.order_by('id').values('text')[:1]), Value('')),
+        item_count=Coalesce(
+            Subquery(items.values('list').annotate(count=Count('id')).values('count')),
+            Value(0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0006_list_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='last_modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='name',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='list',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, to='lists.List'),
+        ),
+        migrations.RunPython(fill_list_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 12:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_list_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 12:37
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0008_list_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='list',
+            field=models.ForeignKey(db_index=False, default=None, on_delete=django.db.models.deletion.CASCADE, to='lists.List'),
+        ),
+        migrations.AlterField(
+            model_name='list',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['list', 'id'], name='lists_item_list_id'),
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['owner', 'last_modified'], name='lists_list_owner_modified'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import migrations, transaction
+from django.db.models import Case, CharField, Value, When
+
+# three query parameters per item, under SQLite's limit of 999
+BATCH_SIZE = 300
+
+
+def fill_text_hashes(apps, schema_editor):
+    '''hash every item in id ranges, one short transaction per range'''
+    Item = apps.get_model('lists', 'Item')
+    last_id = 0
+    while True:
+        rows = list(
+            Item.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'text')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        with transaction.atomic():
+            Item.objects.filter(id__in=[id_ for id_, _ in rows]).update(text_hash=Case(
+                *[When(id=id_, then=Value(hashlib.sha256(text.encode()).hexdigest()))
+                  for id_, text in rows],
+                output_field=CharField()
+            ))
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+    # keeps the batches in separate transactions
+    atomic = False
+
+    dependencies = [
+        ('lists', '0010_item_text_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_text_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 12:39
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0011_fill_item_text_hash'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='item',
+            unique_together=set([('list', 'text_hash')]),
+        ),
+    ]
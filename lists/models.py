@@ -1,10 +1,66 @@
-from django.db import models
+import hashlib
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.utils import timezone
+
+
+def text_digest(text):
+    '''fixed size stand-in for item text in the unique index'''
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ListQuerySet(models.QuerySet):
+
+    def rebuild_summaries(self):
+        '''recompute summary columns from items in one UPDATE'''
+        items = Item.objects.filter(list=OuterRef('pk')).order_by()
+        first_item_text = items.order_by('id').values('text')[:1]
+        item_count = items.values('list').annotate(count=Count('id')).values('count')
+        return self.update(
+            name=Coalesce(Subquery(first_item_text), Value('')),
+            item_count=Coalesce(Subquery(item_count), Value(0)),
+            last_modified=timezone.now(),
+            version=F('version') + 1,
+        )
+
+
+class ItemQuerySet(models.QuerySet):
+
+    def delete(self):
+        '''delete items and rebuild the summary of every list they were in, once'''
+        with transaction.atomic():
+            list_ids = sorted(set(self.order_by().values_list('list_id', flat=True)))
+            result = super().delete()
+            for start in range(0, len(list_ids), List.LOOKUP_BATCH_SIZE):
+                ids = list_ids[start:start + List.LOOKUP_BATCH_SIZE]
+                List.objects.filter(id__in=ids).rebuild_summaries()
+        return result
 
 
 class List(models.Model):
-    owner = models.ForeignKey(settings.AUTH_USER_MODEL, blank=True, null=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, blank=True, null=True, db_index=False
+    )
+    name = models.TextField(default='', editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    last_modified = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ListQuerySet.as_manager()
+
+    LOOKUP_BATCH_SIZE = 500
+
+    class Meta:
+        indexes = [
+            # my_lists reads lists by owner, and the Max(last_modified)
+            # of its ETag comes straight out of the index
+            models.Index(fields=['owner', 'last_modified'], name='lists_list_owner_modified'),
+        ]
 
     def get_absolute_url(self):
         return reverse('view_list', args=[self.id])
@@ -15,18 +71,102 @@ class List(models.Model):
         Item.objects.create(list=list_, text=first_item_text)
         return list_
 
-    @property
-    def name(self):
-        return self.item_set.first().text
+    def add_items(self, texts):
+        '''append many items with bulk inserts, skipping texts already in the list
+
+        returns indexes of the texts that were skipped as duplicates
+        '''
+        with transaction.atomic():
+            seen = set()
+            digests = [text_digest(text) for text in texts]
+            for start in range(0, len(texts), self.LOOKUP_BATCH_SIZE):
+                batch = digests[start:start + self.LOOKUP_BATCH_SIZE]
+                existing = self.item_set.filter(text_hash__in=batch).order_by()
+                seen.update(existing.values_list('text', flat=True))
+            added, duplicates = [], []
+            for index, (text, digest) in enumerate(zip(texts, digests)):
+                if text in seen:
+                    duplicates.append(index)
+                else:
+                    seen.add(text)
+                    added.append(Item(list=self, text=text, text_hash=digest))
+            Item.objects.bulk_create(added)
+            added = [item.text for item in added]
+            self.items_added(added)
+        return duplicates
+
+    def items_added(self, texts):
+        '''update summary after new items were appended to the list'''
+        if not texts:
+            return
+        now = timezone.now()
+        List.objects.filter(pk=self.pk).update(
+            item_count=F('item_count') + len(texts),
+            name=Case(When(item_count=0, then=Value(texts[0])), default=F('name')),
+            last_modified=now,
+            version=F('version') + 1,
+        )
+        if self.item_count == 0:
+            self.name = texts[0]
+        self.item_count += len(texts)
+        self.last_modified = now
+        self.version += 1
+
+    def update_summary(self):
+        '''recompute summary after items were changed or deleted'''
+        List.objects.filter(pk=self.pk).rebuild_summaries()
+        self.refresh_from_db(fields=['name', 'item_count', 'last_modified', 'version'])
 
 
 class Item(models.Model):
     text = models.TextField(default='')
-    list = models.ForeignKey(List, default=None)
+    list = models.ForeignKey(List, default=None, db_index=False)
+    text_hash = models.CharField(max_length=64, editable=False)
+
+    objects = ItemQuerySet.as_manager()
 
     class Meta:
         ordering = ('id',)
-        unique_together = ('list', 'text')
+        unique_together = ('list', 'text_hash')
+        indexes = [
+            # items are always read as list_id = ? ORDER BY id
+            models.Index(fields=['list', 'id'], name='lists_item_list_id'),
+        ]
 
     def __str__(self):
         return self.text
+
+    def validate_unique(self, exclude=None):
+        '''find duplicates through text_hash, but compare their real text'''
+        exclude = set(exclude or ())
+        super().validate_unique(exclude=exclude | {'text_hash'})
+        if exclude & {'list', 'text'}:
+            return
+        duplicates = Item.objects.filter(
+            list_id=self.list_id, text_hash=text_digest(self.text), text=self.text
+        ).exclude(pk=self.pk)
+        if duplicates.exists():
+            raise ValidationError({
+                NON_FIELD_ERRORS: [self.unique_error_message(Item, ('list', 'text'))]
+            })
+
+    def save(self, *args, **kwargs):
+        '''save item and keep list summary in sync'''
+        adding = self._state.adding
+        self.text_hash = text_digest(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'text_hash'}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.list.items_added([self.text])
+            else:
+                self.list.update_summary()
+
+    def delete(self, *args, **kwargs):
+        '''delete item and keep list summary in sync'''
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.list.update_summary()
+        return result
@@ -3,4 +3,25 @@ window.Superlists.initialize = function () {
     $('input[name="text"]').on('keypress', function (){
         $('.has-error').hide();
     });
+    $('#id_load_more').on('click', function () {
+        window.Superlists.loadMore($(this));
+    });
+};
+window.Superlists.loadMore = function (button) {
+    var rows = $('#id_list_table tr');
+    var query = {after: rows.last().data('item-id'), start: rows.length};
+    $.getJSON(button.data('url'), query, function (data) {
+        window.Superlists.appendItems(data.items);
+        if (data.after === null) {
+            button.remove();
+        }
+    });
+};
+window.Superlists.appendItems = function (items) {
+    var table = $('#id_list_table');
+    $.each(items, function (i, item) {
+        var row = $('<tr>').attr('data-item-id', item.id);
+        row.append($('<td>').text(item.number + ': ' + item.text));
+        table.append(row);
+    });
 };
@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lists.models import Item, List
+
+User = get_user_model()
+
+
+class RebuildListSummariesTest(TestCase):
+
+    def test_rebuilds_summaries_in_batches(self):
+        lists = [List.create_new(first_item_text=f'list {i}') for i in range(5)]
+        Item.objects.create(list=lists[0], text='second')
+        List.objects.update(name='', item_count=0)
+
+        out = StringIO()
+        call_command('rebuild_list_summaries', batch_size=2, stdout=out)
+
+        self.assertIn('Rebuilt 5 list summaries', out.getvalue())
+        first = List.objects.get(id=lists[0].id)
+        self.assertEqual((first.name, first.item_count), ('list 0', 2))
+        last = List.objects.get(id=lists[4].id)
+        self.assertEqual((last.name, last.item_count), ('list 4', 1))
+
+
+class ExportImportListsTest(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create(email='a@b.com')
+        first = List.create_new(first_item_text='first 1', owner=self.owner)
+        second = List.create_new(first_item_text='second 1')
+        Item.objects.create(list=first, text='first 2')
+        Item.objects.create(list=second, text='second, "2"')
+        Item.objects.create(list=first, text='first 3')
+        List.objects.create(owner=self.owner)
+
+    def round_trip(self, format):
+        exported = StringIO()
+        call_command('export_lists', format=format, chunk_size=2,
+                     stdout=exported, stderr=StringIO())
+        List.objects.all().delete()
+        User.objects.all().delete()
+        with patch('sys.stdin', StringIO(exported.getvalue())):
+            call_command('import_lists', format=format, batch_size=2, stdout=StringIO())
+
+    def assert_lists_restored(self):
+        lists = List.objects.order_by('id')
+        self.assertEqual(
+            [[item.text for item in list_.item_set.all()] for list_ in lists],
+            [['first 1', 'first 2', 'first 3'], ['second 1', 'second, "2"'], []]
+        )
+        self.assertEqual(lists[0].owner, User.objects.get(email='a@b.com'))
+        self.assertIsNone(lists[1].owner)
+        self.assertEqual((lists[0].name, lists[0].item_count), ('first 1', 3))
+        self.assertEqual((lists[2].owner, lists[2].item_count), (lists[0].owner, 0))
+
+    def test_export_writes_one_json_line_per_item(self):
+        out = StringIO()
+        call_command('export_lists', stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['owner'], 'a@b.com')
+        self.assertEqual(rows[0]['text'], 'first 1')
+        self.assertEqual((rows[5]['owner'], rows[5]['text']), ('a@b.com', None))
+
+    def test_import_creates_lists_in_one_insert_per_batch(self):
+        rows = [
+            {'list': str(number), 'owner': f'owner{number}@example.com', 'text': 'item'}
+            for number in range(600)
+        ]
+        stdin = StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+        with patch('sys.stdin', stdin), CaptureQueriesContext(connection) as queries:
+            call_command('import_lists', batch_size=600, stdout=StringIO())
+        list_inserts = [
+            query for query in queries if query['sql'].startswith('INSERT INTO "lists_list"')
+        ]
+        self.assertLess(len(list_inserts), 10)
+        self.assertEqual(List.objects.filter(owner__email__startswith='owner').count(), 600)
+
+    def test_jsonl_round_trip(self):
+        self.round_trip('jsonl')
+        self.assert_lists_restored()
+
+    def test_csv_round_trip(self):
+        self.round_trip('csv')
+        self.assert_lists_restored()
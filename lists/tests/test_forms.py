@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 import unittest
 from unittest.mock import patch, Mock
 
@@ -85,4 +85,30 @@ class NewListFormTest(unittest.TestCase):
         form = NewListForm(data={'text': 'new item text'})
         form.is_valid()
         response = form.save(owner=user)
-        self.assertEqual(response, mock_List_create_new.return_value)
\ No newline at end of file
+        self.assertEqual(response, mock_List_create_new.return_value)
+
+@override_settings(LISTS_DUPLICATE_CHECK='constraint')
+class ExistingListItemFormConstraintModeTest(TestCase):
+    '''test form for existing lists relying on the unique constraint'''
+
+    def test_validation_does_not_query_for_duplicates(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={'text': 'No twins!'})
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+
+    def test_save_reports_duplicate_error(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text='No twins!')
+        form = ExistingListItemForm(for_list=list_, data={'text': 'No twins!'})
+        form.is_valid()
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors['text'], [DUPLICATE_ITEM_ERROR])
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_save_creates_item(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={'text': 'foo bar'})
+        form.is_valid()
+        new_item = form.save()
+        self.assertEqual(new_item, Item.objects.first())
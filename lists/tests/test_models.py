@@ -1,8 +1,12 @@
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
-from lists.models import Item, List
+from lists.models import Item, List, text_digest
 
 User = get_user_model()
 
@@ -49,6 +53,20 @@ class ListModelTest(TestCase):
             item = Item(text='foo bar', list=list_)
             item.full_clean()
 
+    def test_saving_stores_text_hash(self):
+        item = Item.objects.create(list=List.objects.create(), text='foo bar')
+        self.assertEqual(item.text_hash, text_digest('foo bar'))
+        item.text = 'changed'
+        item.save(update_fields=['text'])
+        self.assertEqual(Item.objects.get().text_hash, text_digest('changed'))
+
+    def test_duplicate_check_compares_real_text(self):
+        '''test: items whose hashes collide are not reported as duplicates'''
+        list_ = List.objects.create()
+        with patch('lists.models.text_digest', return_value='same'):
+            Item.objects.create(text='foo', list=list_)
+            Item(text='bar', list=list_).full_clean()
+
     def test_CAN_save_same_item_to_different_lists(self):
         '''test: can save same item in different lists'''
         list1 = List.objects.create()
@@ -97,4 +115,82 @@ class ListModelTest(TestCase):
         list_ = List.objects.create()
         Item.objects.create(text='first item', list=list_)
         Item.objects.create(text='second item', list=list_)
-        self.assertEqual(list_.name, 'first item')
\ No newline at end of file
+        self.assertEqual(list_.name, 'first item')
+
+    def test_new_list_has_empty_summary(self):
+        list_ = List.objects.create()
+        self.assertEqual(list_.name, '')
+        self.assertEqual(list_.item_count, 0)
+
+    def test_summary_is_updated_when_items_are_added(self):
+        list_ = List.create_new(first_item_text='first item')
+        Item.objects.create(text='second item', list=list_)
+        saved_list = List.objects.get(id=list_.id)
+        self.assertEqual(saved_list.name, 'first item')
+        self.assertEqual(saved_list.item_count, 2)
+
+    def test_adding_item_moves_last_modified_forward(self):
+        list_ = List.create_new(first_item_text='first item')
+        before = List.objects.get(id=list_.id).last_modified
+        Item.objects.create(text='second item', list=list_)
+        self.assertGreater(List.objects.get(id=list_.id).last_modified, before)
+
+    def test_summary_is_updated_when_first_item_is_deleted(self):
+        list_ = List.create_new(first_item_text='first item')
+        Item.objects.create(text='second item', list=list_)
+        Item.objects.get(text='first item').delete()
+        saved_list = List.objects.get(id=list_.id)
+        self.assertEqual(saved_list.name, 'second item')
+        self.assertEqual(saved_list.item_count, 1)
+
+    def test_summary_is_updated_by_queryset_delete(self):
+        list_ = List.create_new(first_item_text='first item')
+        Item.objects.create(text='second item', list=list_)
+        version = List.objects.get(id=list_.id).version
+        Item.objects.filter(list=list_, text='first item').delete()
+        saved_list = List.objects.get(id=list_.id)
+        self.assertEqual((saved_list.name, saved_list.item_count), ('second item', 1))
+        self.assertEqual(saved_list.version, version + 1)
+
+    def test_queryset_delete_rebuilds_each_list_once(self):
+        lists = [List.create_new(first_item_text=f'list {i}') for i in range(2)]
+        for list_ in lists:
+            list_.add_items([f'item {i}' for i in range(10)])
+        with CaptureQueriesContext(connection) as queries:
+            Item.objects.exclude(text__startswith='list').delete()
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        for list_ in lists:
+            saved_list = List.objects.get(id=list_.id)
+            self.assertEqual((saved_list.item_count, saved_list.version), (1, list_.version + 1))
+
+    def test_summary_is_updated_when_item_text_changes(self):
+        list_ = List.create_new(first_item_text='first item')
+        item = Item.objects.get(list=list_)
+        item.text = 'renamed'
+        item.save()
+        self.assertEqual(List.objects.get(id=list_.id).name, 'renamed')
+
+    def test_rebuild_summaries_recomputes_from_items(self):
+        list_ = List.create_new(first_item_text='first item')
+        empty_list = List.objects.create()
+        List.objects.update(name='stale', item_count=42)
+        List.objects.all().rebuild_summaries()
+        list_.refresh_from_db()
+        empty_list.refresh_from_db()
+        self.assertEqual((list_.name, list_.item_count), ('first item', 1))
+        self.assertEqual((empty_list.name, empty_list.item_count), ('', 0))
+
+    def test_add_items_returns_indexes_of_duplicates(self):
+        list_ = List.create_new(first_item_text='a')
+        duplicates = list_.add_items(['b', 'a', 'c', 'b'])
+        self.assertEqual(duplicates, [1, 3])
+        self.assertEqual([item.text for item in list_.item_set.all()], ['a', 'b', 'c'])
+        self.assertEqual(list_.item_count, 3)
+
+    def test_version_is_bumped_when_items_change(self):
+        list_ = List.create_new(first_item_text='a')
+        self.assertEqual(list_.version, 1)
+        item = Item.objects.create(list=list_, text='b')
+        item.delete()
+        self.assertEqual(List.objects.get(id=list_.id).version, 3)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lists.models import List
+
+User = get_user_model()
+
+
+class QueryPlanTest(TestCase):
+    '''test that list queries are answered from indexes'''
+
+    def setUp(self):
+        self.owner = User.objects.create(email='a@b.com')
+        self.list_ = List.objects.create(owner=self.owner)
+        self.list_.add_items([f'item {i}' for i in range(20)])
+        List.create_new(first_item_text='other', owner=self.owner)
+
+    def assertIndexedQueries(self, request):
+        '''EXPLAIN every query on list tables run by request'''
+        with CaptureQueriesContext(connection) as captured:
+            request()
+        plans = {}
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'lists_' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(plans, 'no list queries captured')
+        for sql, plan in plans.items():
+            for step in plan:
+                self.assertFalse(
+                    step.startswith('SCAN') or 'TEMP B-TREE' in step,
+                    f'{step}\nin the plan of\n{sql}'
+                )
+
+    def test_view_list(self):
+        self.assertIndexedQueries(lambda: self.client.get(self.list_.get_absolute_url()))
+
+    def test_list_items_page(self):
+        first = self.list_.item_set.first()
+        self.assertIndexedQueries(
+            lambda: self.client.get(f'/lists/{self.list_.id}/items?after={first.id}')
+        )
+
+    def test_my_lists(self):
+        self.assertIndexedQueries(lambda: self.client.get(f'/lists/users/{self.owner.email}/'))
+
+    def test_duplicate_check(self):
+        self.assertIndexedQueries(
+            lambda: self.client.post(self.list_.get_absolute_url(), data={'text': 'item 3'})
+        )
+
+    def test_owner_summary_is_index_only(self):
+        '''test: the my_lists ETag aggregate never reads the list rows'''
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(f'/lists/users/{self.owner.email}/')
+        summary = next(q['sql'] for q in captured.captured_queries if 'MAX(' in q['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + summary)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertIn('COVERING INDEX lists_list_owner_modified', ' '.join(plan))
@@ -1,6 +1,10 @@
-from django.test import TestCase
+import gzip
+import json
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from unittest import skip, TestCase as UnitTestCase
 from unittest.mock import patch, Mock
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.http import HttpRequest
 from django.utils.html import escape
@@ -15,6 +19,9 @@ User = get_user_model()
 class HomePageTest(TestCase):
     '''home page test'''
 
+    def setUp(self):
+        caches['default'].clear()
+
     def test_uses_home_template(self):
         '''test: home page return correct html'''
         response = self.client.get('/')
@@ -252,3 +259,317 @@ class ListViewTest(TestCase):
         self.assertTemplateUsed(response, 'list.html')
         self.assertEqual(Item.objects.all().count(), 1)
 
+
+class MyListsTest(TestCase):
+
+    def test_my_lists_url_renders_my_lists_template(self):
+        User.objects.create(email='a@b.com')
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertTemplateUsed(response, 'my_lists.html')
+
+    def test_passes_correct_owner_to_template(self):
+        User.objects.create(email='wrong@owner.com')
+        correct_user = User.objects.create(email='a@b.com')
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertEqual(response.context['owner'], correct_user)
+
+    def test_displays_list_names(self):
+        owner = User.objects.create(email='a@b.com')
+        List.create_new(first_item_text='first list', owner=owner)
+        List.create_new(first_item_text='second list', owner=owner)
+        response = self.client.get('/lists/users/a@b.com/')
+        self.assertContains(response, 'first list')
+        self.assertContains(response, 'second list')
+
+    def test_query_count_does_not_grow_with_number_of_lists(self):
+        owner = User.objects.create(email='a@b.com')
+        List.create_new(first_item_text='list 0', owner=owner)
+        with self.assertNumQueries(3):
+            self.client.get('/lists/users/a@b.com/')
+
+        for i in range(1, 20):
+            List.create_new(first_item_text=f'list {i}', owner=owner)
+        with self.assertNumQueries(3):
+            response = self.client.get('/lists/users/a@b.com/')
+        self.assertContains(response, 'list 19')
+
+
+@patch('lists.views.ITEMS_PER_PAGE', 2)
+class ListPaginationTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.create_new(first_item_text='item 1')
+        for i in range(2, 6):
+            Item.objects.create(list=self.list_, text=f'item {i}')
+        self.items = list(Item.objects.filter(list=self.list_))
+
+    def test_view_list_renders_only_first_page(self):
+        response = self.client.get(f'/lists/{self.list_.id}/')
+        self.assertContains(response, '1: item 1')
+        self.assertContains(response, '2: item 2')
+        self.assertNotContains(response, 'item 3')
+        self.assertContains(response, 'id="id_load_more"')
+
+    def test_no_load_more_button_for_short_list(self):
+        list_ = List.create_new(first_item_text='only item')
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertNotContains(response, 'id="id_load_more"')
+
+    def test_list_items_returns_page_after_given_id(self):
+        response = self.client.get(
+            f'/lists/{self.list_.id}/items', {'after': self.items[1].id, 'start': 2}
+        )
+        self.assertEqual(response.json(), {
+            'items': [
+                {'id': self.items[2].id, 'number': 3, 'text': 'item 3'},
+                {'id': self.items[3].id, 'number': 4, 'text': 'item 4'},
+            ],
+            'after': self.items[3].id,
+        })
+
+    def test_last_page_has_no_next_cursor(self):
+        response = self.client.get(
+            f'/lists/{self.list_.id}/items', {'after': self.items[3].id, 'start': 4}
+        )
+        data = response.json()
+        self.assertEqual([item['number'] for item in data['items']], [5])
+        self.assertIsNone(data['after'])
+
+    def test_list_items_rejects_bad_cursor(self):
+        response = self.client.get(f'/lists/{self.list_.id}/items', {'after': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_items_numbers_page_without_counting(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/lists/{self.list_.id}/items', {'after': self.items[1].id, 'start': 2}
+            )
+        self.assertEqual([item['number'] for item in response.json()['items']], [3, 4])
+
+
+class BulkAddItemsTest(TestCase):
+
+    def post_items(self, list_, items):
+        return self.client.post(
+            f'/lists/{list_.id}/items/bulk',
+            data=json.dumps({'items': items}),
+            content_type='application/json'
+        )
+
+    def test_adds_all_items_in_order(self):
+        list_ = List.create_new(first_item_text='first')
+        response = self.post_items(list_, ['a', 'b', 'c'])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(
+            [item.text for item in list_.item_set.all()], ['first', 'a', 'b', 'c']
+        )
+
+    def test_updates_list_summary(self):
+        list_ = List.objects.create()
+        self.post_items(list_, ['a', 'b'])
+        list_.refresh_from_db()
+        self.assertEqual((list_.name, list_.item_count), ('a', 2))
+
+    def test_reports_duplicates_against_list_and_payload(self):
+        list_ = List.create_new(first_item_text='existing')
+        response = self.post_items(list_, ['existing', 'new', 'new'])
+        self.assertEqual(response.json(), {
+            'created': 1,
+            'conflicts': [
+                {'index': 0, 'text': 'existing', 'error': DUPLICATE_ITEM_ERROR},
+                {'index': 2, 'text': 'new', 'error': DUPLICATE_ITEM_ERROR},
+            ],
+            'errors': [],
+        })
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_empty_items_reject_whole_request(self):
+        list_ = List.objects.create()
+        response = self.post_items(list_, ['ok', ''])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['errors'], [{'index': 1, 'error': EMPTY_ITEM_ERROR}]
+        )
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_rejects_malformed_body(self):
+        list_ = List.objects.create()
+        response = self.client.post(
+            f'/lists/{list_.id}/items/bulk', data='nope', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @patch('lists.views.MAX_BULK_ITEMS', 2)
+    def test_rejects_too_many_items(self):
+        list_ = List.objects.create()
+        response = self.post_items(list_, ['a', 'b', 'c'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_uses_constant_number_of_queries(self):
+        list_ = List.objects.create()
+        with self.assertNumQueries(6):
+            self.post_items(list_, [f'item {i}' for i in range(300)])
+
+
+@override_settings(LISTS_DUPLICATE_CHECK='constraint')
+class ListViewConstraintModeTest(TestCase):
+
+    def test_duplicate_item_validation_errors_end_up_on_lists_page(self):
+        list1 = List.objects.create()
+        Item.objects.create(list=list1, text='textey')
+        response = self.client.post(
+            f'/lists/{list1.id}/',
+            data={'text': 'textey'}
+        )
+        self.assertContains(response, escape(DUPLICATE_ITEM_ERROR))
+        self.assertTemplateUsed(response, 'list.html')
+        self.assertEqual(Item.objects.all().count(), 1)
+
+    def test_POST_redirects_to_list_view(self):
+        list_ = List.objects.create()
+        response = self.client.post(f'/lists/{list_.id}/', data={'text': 'new item'})
+        self.assertRedirects(response, f'/lists/{list_.id}/')
+
+
+class ListTableCacheTest(TestCase):
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+
+    def test_cached_table_skips_item_query(self):
+        list_ = List.create_new(first_item_text='itemey 1')
+        self.client.get(f'/lists/{list_.id}/')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, '1: itemey 1')
+
+    def test_new_item_bumps_version_and_shows_up(self):
+        list_ = List.create_new(first_item_text='itemey 1')
+        self.client.get(f'/lists/{list_.id}/')
+        self.client.post(f'/lists/{list_.id}/', data={'text': 'itemey 2'})
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertContains(response, '2: itemey 2')
+
+    def test_deleted_item_disappears(self):
+        list_ = List.create_new(first_item_text='itemey 1')
+        Item.objects.create(list=list_, text='itemey 2')
+        self.client.get(f'/lists/{list_.id}/')
+        Item.objects.get(text='itemey 2').delete()
+        response = self.client.get(f'/lists/{list_.id}/')
+        self.assertNotContains(response, 'itemey 2')
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.list_ = List.create_new(first_item_text='itemey 1')
+        self.url = f'/lists/{self.list_.id}/'
+
+    def test_list_page_has_validators(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_unchanged_list_returns_304_without_touching_items(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_304_for_anonymous_visitor(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_item_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Item.objects.create(list=self.list_, text='itemey 2')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'itemey 2')
+
+    def test_logging_in_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(User.objects.create(email='a@b.com'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_csrf_cookie_is_part_of_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'another-secret'
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_with_pending_messages_are_not_validated(self):
+        self.client.post('/accounts/send_login_email', data={'email': 'a@b.com'})
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_my_lists_returns_304_until_owner_lists_change(self):
+        owner = User.objects.create(email='a@b.com')
+        List.create_new(first_item_text='mine', owner=owner)
+        url = '/lists/users/a@b.com/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        List.create_new(first_item_text='another', owner=owner)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(LISTS_RENDER_MODE='stream')
+@patch('lists.views.STREAM_CHUNK_SIZE', 2)
+class ListStreamingTest(TestCase):
+    '''test the streaming render mode of the list page'''
+
+    def setUp(self):
+        self.list_ = List.create_new(first_item_text='item 1')
+        self.list_.add_items([f'item {i}' for i in range(2, 6)])
+
+    def get(self, **extra):
+        return self.client.get(f'/lists/{self.list_.id}/', **extra)
+
+    def test_streams_every_item_in_chunks(self):
+        response = self.get()
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('id="id_text"', chunks[0])
+        self.assertNotIn('item 1', chunks[0])
+        self.assertEqual(len(chunks), 5)  # head, three chunks of rows, tail
+        page = ''.join(chunks)
+        for number in range(1, 6):
+            self.assertIn(f'{number}: item {number}', page)
+        self.assertNotIn('id_load_more', page)
+
+    def test_header_is_rendered_before_items_are_read(self):
+        response = self.get()
+        with self.assertNumQueries(0):
+            next(iter(response.streaming_content))
+
+    def test_gzips_for_clients_that_accept_it(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        page = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn('5: item 5', page)
+
+    def test_gzip_body_has_its_own_etag(self):
+        identity = self.get()
+        gzipped = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzipped['ETag'], identity['ETag'][:-1] + '-gzip"')
+        revalidated = self.get(
+            HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_not_buffered_by_nginx(self):
+        self.assertEqual(self.get()['X-Accel-Buffering'], 'no')
+
+    def test_invalid_post_streams_form_errors(self):
+        response = self.client.post(f'/lists/{self.list_.id}/', data={'text': 'item 1'})
+        page = b''.join(response.streaming_content).decode()
+        self.assertIn(escape(DUPLICATE_ITEM_ERROR), page)
+
@@ -19,5 +19,7 @@ from lists import views
 urlpatterns = [
     url(r'^new$', views.NewListView.as_view(), name='new_list'),
     url(r'^(\d+)/$', views.view_list, name='view_list'),
+    url(r'^(\d+)/items$', views.list_items, name='list_items'),
+    url(r'^(\d+)/items/bulk$', views.bulk_add_items, name='bulk_add_items'),
     url(r'^users/(.+)/$', views.my_lists, name='my_lists'),
 ]
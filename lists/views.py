@@ -1,34 +1,246 @@
-from django.shortcuts import render, redirect
+import hashlib
+import json
+import re
+import zlib
+
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.contrib import messages
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.db.models import Count, Max
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from django.views.decorators.vary import vary_on_cookie
 from django.views.generic import FormView, CreateView
 
 from lists.models import Item, List
-from lists.forms import ItemForm, ExistingListItemForm, NewListForm
+from superlists.page_cache import cache_anonymous_page
+from superlists.routers import use_replica
+from lists.forms import (
+    ItemForm, ExistingListItemForm, NewListForm,
+    EMPTY_ITEM_ERROR, DUPLICATE_ITEM_ERROR)
 
 User = get_user_model()
 
+ITEMS_PER_PAGE = 100
+MAX_BULK_ITEMS = 1000
+STREAM_CHUNK_SIZE = 500
+ROWS_MARKER = '<!-- rows -->'
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
 
+@method_decorator(cache_anonymous_page(settings.ANONYMOUS_PAGE_CACHE_SECONDS), name='dispatch')
+@method_decorator(use_replica, name='dispatch')
 class HomePageView(FormView):
     '''home page'''
     template_name = 'home.html'
     form_class = NewListForm
 
 
+def _page_etag(request, marker):
+    '''etag for a page with this change marker as seen by this visitor
+
+    the page also shows the user nav bar and a CSRF token, so the user and
+    the CSRF secret are part of the tag
+    '''
+    user = request.user.email if request.user.is_authenticated else ''
+    get_token(request)  # makes sure the secret the page will use exists
+    csrf_secret = request.META['CSRF_COOKIE']
+    return hashlib.sha1(f'{marker}|{user}|{csrf_secret}'.encode()).hexdigest()
+
+
+def _is_conditional(request):
+    '''only reads without pending flash messages are revalidated'''
+    return (
+        request.method in ('GET', 'HEAD')
+        and not len(messages.get_messages(request))
+    )
+
+
+def _get_list(request, list_id):
+    '''list for this request, fetched once for both the view and its validators'''
+    if not hasattr(request, '_list'):
+        request._list = List.objects.get(id=list_id)
+    return request._list
+
+
+def _list_etag(request, list_id):
+    if not _is_conditional(request):
+        return None
+    list_ = _get_list(request, list_id)
+    etag = _page_etag(
+        request, f'list-{list_.id}-{list_.version}-{list_.last_modified.isoformat()}'
+    )
+    # gzip and identity bodies are different representations with their own tags
+    return etag + '-gzip' if _streams_gzip(request) else etag
+
+
+def _streams_gzip(request):
+    return (
+        getattr(settings, 'LISTS_RENDER_MODE', 'paginate') == 'stream'
+        and ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    )
+
+
+def _list_last_modified(request, list_id):
+    if not _is_conditional(request) or request.user.is_authenticated:
+        return None
+    return _get_list(request, list_id).last_modified
+
+
+def _owner_lists_summary(request, email):
+    '''(count, last modified) of the owner's lists, computed once per request'''
+    if not hasattr(request, '_owner_lists_summary'):
+        summary = List.objects.filter(owner_id=email).aggregate(
+            count=Count('id'), last_modified=Max('last_modified'))
+        request._owner_lists_summary = summary['count'], summary['last_modified']
+    return request._owner_lists_summary
+
+
+def _my_lists_etag(request, email):
+    if not _is_conditional(request):
+        return None
+    count, last_modified = _owner_lists_summary(request, email)
+    stamp = last_modified.isoformat() if last_modified else ''
+    return _page_etag(request, f'owner-{email}-{count}-{stamp}')
+
+
+def _my_lists_last_modified(request, email):
+    if not _is_conditional(request) or request.user.is_authenticated:
+        return None
+    return _owner_lists_summary(request, email)[1]
+
+
+@use_replica
+@vary_on_cookie
+@condition(etag_func=_list_etag, last_modified_func=_list_last_modified)
 def view_list(request, list_id):
     '''list view'''
-    list_ = List.objects.get(id=list_id)
+    list_ = _get_list(request, list_id)
     form = ExistingListItemForm(for_list=list_)
     if request.method == 'POST':
         form = ExistingListItemForm(data=request.POST, for_list=list_)
-        if form.is_valid():
-            form.save()
+        if form.is_valid() and form.save():
             return redirect(list_)
-    return render(request, 'list.html', {'list': list_, 'form': form})
+    if getattr(settings, 'LISTS_RENDER_MODE', 'paginate') == 'stream':
+        return _stream_list(request, list_, form)
+    items = list_.item_set.all()[:ITEMS_PER_PAGE]
+    return render(request, 'list.html', {
+        'list': list_, 'form': form, 'items': items, 'page_size': ITEMS_PER_PAGE
+    })
+
+
+def _stream_list(request, list_, form):
+    '''whole list page as a stream: header and form at once, then rows in chunks'''
+    page = render_to_string('list_stream.html', {'list': list_, 'form': form}, request)
+    head, tail = page.split(ROWS_MARKER)
+
+    def chunks():
+        yield head
+        number, last_id = 0, 0
+        while True:
+            items = list(
+                Item.objects.filter(list_id=list_.id, id__gt=last_id)
+                .order_by('id').values('id', 'text')[:STREAM_CHUNK_SIZE]
+            )
+            if not items:
+                break
+            yield render_to_string('list_rows.html', {'items': items, 'offset': number})
+            number += len(items)
+            last_id = items[-1]['id']
+        yield tail
+
+    content = (chunk.encode() for chunk in chunks())
+    gzip = _streams_gzip(request)
+    if gzip:
+        content = _gzip_chunks(content)
+    response = StreamingHttpResponse(content, content_type='text/html; charset=utf-8')
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['X-Accel-Buffering'] = 'no'  # nginx passes every chunk on as it comes
+    return response
+
+
+def _gzip_chunks(chunks):
+    '''gzip a stream, flushing after every chunk so none waits for the next one'''
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@use_replica
+def list_items(request, list_id):
+    '''next page of list items after the given item id, as JSON
+
+    the client passes how many rows it already shows as start, so numbering
+    the page needs no COUNT over the items before it
+    '''
+    try:
+        after = int(request.GET.get('after', 0))
+        start = int(request.GET.get('start', 0))
+    except ValueError:
+        return HttpResponseBadRequest('after must be an item id and start a row count')
+    items = Item.objects.filter(list_id=list_id)
+    page = list(items.filter(id__gt=after)[:ITEMS_PER_PAGE + 1])
+    has_more = len(page) > ITEMS_PER_PAGE
+    page = page[:ITEMS_PER_PAGE]
+    return JsonResponse({
+        'items': [
+            {'id': item.id, 'number': start + number, 'text': item.text}
+            for number, item in enumerate(page, 1)
+        ],
+        'after': page[-1].id if has_more else None,
+    })
+
+
+@csrf_exempt
+@require_POST
+def bulk_add_items(request, list_id):
+    '''add many items to a list from a JSON body {"items": ["text", ...]}'''
+    list_ = get_object_or_404(List, id=list_id)
+    try:
+        texts = json.loads(request.body.decode('utf-8'))['items']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'expected a JSON object with an "items" list'}, status=400)
+    if not isinstance(texts, list) or len(texts) > MAX_BULK_ITEMS:
+        return JsonResponse(
+            {'error': f'"items" must be a list of at most {MAX_BULK_ITEMS} texts'}, status=400
+        )
+    errors = [
+        {'index': index, 'error': EMPTY_ITEM_ERROR}
+        for index, text in enumerate(texts)
+        if not isinstance(text, str) or not text
+    ]
+    if errors:
+        return JsonResponse({'created': 0, 'conflicts': [], 'errors': errors}, status=400)
+    try:
+        duplicates = list_.add_items(texts)
+    except IntegrityError:
+        return JsonResponse({'error': 'list was changed concurrently, retry'}, status=409)
+    conflicts = [
+        {'index': index, 'text': texts[index], 'error': DUPLICATE_ITEM_ERROR}
+        for index in duplicates
+    ]
+    return JsonResponse({
+        'created': len(texts) - len(duplicates), 'conflicts': conflicts, 'errors': []
+    }, status=201)
 
 
+@use_replica
+@vary_on_cookie
+@condition(etag_func=_my_lists_etag, last_modified_func=_my_lists_last_modified)
 def my_lists(request, email):
     owner = User.objects.get(email=email)
-    return render(request, 'my_lists.html', {'owner': owner})
+    lists = owner.list_set.all()
+    return render(request, 'my_lists.html', {'owner': owner, 'lists': lists})
 
 
 class NewListView(CreateView, HomePageView):
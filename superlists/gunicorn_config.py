@@ -0,0 +1,107 @@
+'''gunicorn settings sized to the host, load with -c python:superlists.gunicorn_config
+
+every value can be overridden through GUNICORN_* environment variables
+'''
+import gc
+import math
+import os
+
+# rough resident size of one worker with the project loaded
+MEMORY_PER_WORKER = 120 * 1024 * 1024
+
+
+def cpu_count():
+    '''cpus this process may run on, which honours taskset and cgroup cpusets'''
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory(meminfo='/proc/meminfo'):
+    '''bytes the kernel reports as available, None when unknown'''
+    try:
+        with open(meminfo) as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count(cpus, memory, memory_per_worker=MEMORY_PER_WORKER):
+    '''2 * cpus + 1 workers, fewer when they would not fit in memory'''
+    workers = 2 * cpus + 1
+    if memory is not None:
+        workers = min(workers, memory // memory_per_worker)
+    return max(1, workers)
+
+
+def thread_count(cpus, workers):
+    '''threads per gthread worker, making up for workers the memory cap removed'''
+    return max(2, math.ceil(4 * cpus / workers))
+
+
+def env_flag(name, default):
+    return os.environ.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes')
+
+
+_cpus = cpu_count()
+
+workers = int(os.environ.get('GUNICORN_WORKERS') or worker_count(_cpus, available_memory()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS') or thread_count(_cpus, workers))
+if worker_class != 'gthread':
+    threads = 1
+
+# load the app once in the master so workers share its memory pages
+preload_app = env_flag('GUNICORN_PRELOAD', True)
+
+# recycle workers now and then, the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+
+if preload_app:
+    # a collection in the master would touch every object header and undo
+    # copy-on-write sharing, so hold it off until the preloaded objects are
+    # frozen out of the collector's reach
+    gc.disable()
+
+
+def when_ready(server):
+    if preload_app:
+        gc.freeze()
+        gc.enable()
+    server.log.info(
+        f'{workers} {worker_class} workers, {threads} threads each, '
+        f'preload {"on" if preload_app else "off"}'
+    )
+
+
+def worker_exit(server, worker):
+    metrics = _metrics()
+    if metrics is not None:
+        # counts since the last periodic flush would otherwise be lost
+        metrics.registry.flush()
+
+
+def child_exit(server, worker):
+    metrics = _metrics()
+    if metrics is not None:
+        metrics.archive_process(worker.pid)
+
+
+def _metrics():
+    '''superlists.metrics when request metrics are enabled, else None'''
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'superlists.settings')
+    from django.conf import settings
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        return None
+    from superlists import metrics
+    return metrics
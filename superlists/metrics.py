@@ -0,0 +1,218 @@
+'''per-view request metrics, exposed in Prometheus text format
+
+Every process keeps its own counters in memory and periodically writes a
+snapshot to METRICS_DIR/<pid>.json. The metrics view adds up the snapshots
+of all gunicorn workers, so whichever worker answers the scrape reports
+totals for the whole server. When a worker exits, gunicorn's master folds
+its snapshot into METRICS_DIR/archive.json (see superlists/gunicorn_config.py),
+so recycled workers neither lose their counts nor leave files behind.
+'''
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5
+
+logger = logging.getLogger(__name__)
+ARCHIVE_NAME = 'archive.json'
+
+
+class MetricsRegistry(object):
+    '''request counters of this process, grouped by URL name'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_flush = 0
+
+    def record(self, view, duration, sql_count, sql_time):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = _empty_stats()
+            stats['count'] += 1
+            stats['buckets'][bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats['duration'] += duration
+            stats['sql_count'] += sql_count
+            stats['sql_time'] += sql_time
+            now = time.time()
+            due = now - self.last_flush > FLUSH_INTERVAL
+            if due:
+                self.last_flush = now  # so no other thread flushes as well
+        if due:
+            try:
+                self.flush()
+            except OSError:
+                logger.warning('could not write metrics to %s', settings.METRICS_DIR,
+                               exc_info=True)
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.views))
+
+    def flush(self):
+        '''write this process' counters where the other workers can read them'''
+        snapshot = self.snapshot()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _write_snapshot(os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json'), snapshot)
+
+    def clear(self):
+        with self.lock:
+            self.views = {}
+
+    def collect(self):
+        '''counters of every worker, this one taken fresh from memory'''
+        totals = {}
+        own_file = f'{os.getpid()}.json'
+        snapshots = [self.snapshot()]
+        if os.path.isdir(settings.METRICS_DIR):
+            for name in os.listdir(settings.METRICS_DIR):
+                if not name.endswith('.json') or name == own_file:
+                    continue
+                snapshot = _read_snapshot(os.path.join(settings.METRICS_DIR, name))
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        for snapshot in snapshots:
+            _add_snapshot(totals, snapshot)
+        return totals
+
+
+def archive_process(pid):
+    '''fold the snapshot of an exited process into the archive and remove it'''
+    path = os.path.join(settings.METRICS_DIR, f'{pid}.json')
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    archive_path = os.path.join(settings.METRICS_DIR, ARCHIVE_NAME)
+    archive = _read_snapshot(archive_path) or {}
+    _add_snapshot(archive, snapshot)
+    _write_snapshot(archive_path, archive)
+    os.remove(path)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path, snapshot):
+    '''replace path in one step, so readers never see a partial file'''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _add_snapshot(totals, snapshot):
+    for view, stats in snapshot.items():
+        total = totals.setdefault(view, _empty_stats())
+        for key in ('count', 'duration', 'sql_count', 'sql_time'):
+            total[key] += stats[key]
+        for i, value in enumerate(stats['buckets']):
+            total['buckets'][i] += value
+
+
+def _empty_stats():
+    return {
+        'count': 0,
+        'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'duration': 0.0,
+        'sql_count': 0,
+        'sql_time': 0.0,
+    }
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware(object):
+    '''record latency and SQL use of every request under its URL name'''
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # query counts come from the superlists.sqlite3 cursor wrapper,
+        # which is cheaper than keeping every SQL string like DEBUG does
+        databases = [db for db in connections.all() if hasattr(db, 'query_count')]
+        before = [(db.query_count, db.query_time) for db in databases]
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            sql_count, sql_time = 0, 0.0
+            for db, (count, query_time) in zip(databases, before):
+                sql_count += db.query_count - count
+                sql_time += db.query_time - query_time
+            match = request.resolver_match
+            view = match.url_name if match and match.url_name else 'unresolved'
+            registry.record(view, duration, sql_count, sql_time)
+        return response
+
+
+def metrics(request):
+    '''Prometheus scrape endpoint, only answered to internal addresses'''
+    if (not getattr(settings, 'METRICS_ENABLED', False)
+            or request.META.get('REMOTE_ADDR', '') not in settings.METRICS_ALLOWED_IPS):
+        raise Http404
+    lines = []
+    totals = sorted(registry.collect().items())
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    family('superlists_requests_total', 'counter', 'Requests handled per view.')
+    for view, stats in totals:
+        lines.append(f'superlists_requests_total{{view="{view}"}} {stats["count"]}')
+
+    family('superlists_request_duration_seconds', 'histogram', 'Request latency per view.')
+    for view, stats in totals:
+        cumulative = 0
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        for bound, value in zip(bounds, stats['buckets']):
+            cumulative += value
+            lines.append(
+                f'superlists_request_duration_seconds_bucket'
+                f'{{view="{view}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'superlists_request_duration_seconds_sum{{view="{view}"}} {stats["duration"]}'
+        )
+        lines.append(
+            f'superlists_request_duration_seconds_count{{view="{view}"}} {stats["count"]}'
+        )
+
+    family('superlists_sql_queries_total', 'counter', 'SQL queries run per view.')
+    for view, stats in totals:
+        lines.append(f'superlists_sql_queries_total{{view="{view}"}} {stats["sql_count"]}')
+
+    family('superlists_sql_duration_seconds_total', 'counter', 'Time spent in SQL per view.')
+    for view, stats in totals:
+        lines.append(
+            f'superlists_sql_duration_seconds_total{{view="{view}"}} {stats["sql_time"]}'
+        )
+
+    return HttpResponse(
+        '\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
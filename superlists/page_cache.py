@@ -0,0 +1,59 @@
+'''whole-response cache for pages that look the same to every anonymous visitor
+
+The only per-visitor part of such a page is its CSRF token. Before a page
+is stored every copy of the token is swapped for a placeholder, and each
+hit gets a fresh token for its own visitor, which also sets their CSRF
+cookie as usual.
+'''
+import hashlib
+import re
+from functools import wraps
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+CSRF_PLACEHOLDER = b'<<csrf-token>>'
+CSRF_INPUT_RE = re.compile(rb'''name=['"]csrfmiddlewaretoken['"] value=['"]([^'"]+)['"]''')
+
+
+def page_cache_key(request):
+    url = f'{request.get_host()}{request.get_full_path()}'
+    return 'page:' + hashlib.sha1(url.encode()).hexdigest()
+
+
+def _is_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def cache_anonymous_page(timeout):
+    '''serve the view's response to anonymous visitors from the cache for timeout seconds'''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(
+                    content.replace(CSRF_PLACEHOLDER, get_token(request).encode()),
+                    content_type=content_type
+                )
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code == 200 and not response.streaming:
+                content = response.content
+                for token in set(CSRF_INPUT_RE.findall(content)):
+                    content = content.replace(token, CSRF_PLACEHOLDER)
+                cache.set(key, (content, response['Content-Type']), timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+'''routing of reads to replica databases
+
+Views opt in with the use_replica decorator: their GET and HEAD requests
+read from a random replica listed in DATABASE_REPLICAS. Everything else
+uses the primary, and so does the rest of a request once it has saved or
+deleted a model. After an unsafe request, or one that saved something,
+ReplicaPinningMiddleware sets a cookie that keeps the client on the
+primary for REPLICA_PIN_SECONDS, long enough for the replicas to catch
+up, so the page a client is redirected to after a change always shows it.
+
+Writes are noticed through the post_save and post_delete signals rather
+than db_for_write, which Django also asks when a foreign key is merely
+assigned.
+'''
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+PIN_COOKIE_NAME = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def use_replica(view):
+    '''read from a replica on safe requests of clients not pinned to the primary'''
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or PIN_COOKIE_NAME in request.COOKIES:
+            return view(request, *args, **kwargs)
+        _state.use_replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.use_replica = False
+    return wrapper
+
+
+def live_replicas():
+    '''replicas that are databases of their own, unlike test mirrors of the primary'''
+    primary = connections['default'].settings_dict['NAME']
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if connections[alias].settings_dict['NAME'] != primary
+    ]
+
+
+class ReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'use_replica', False):
+            replicas = live_replicas()
+            if replicas:
+                return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas are copies of the primary
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def read_own_writes(sender, **kwargs):
+    _state.use_replica = False
+    _state.wrote = True
+
+
+class ReplicaPinningMiddleware(object):
+    '''keep clients that just wrote on the primary until replicas catch up'''
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.wrote = False
+        response = self.get_response(request)
+        if _state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+            )
+        return response
@@ -49,11 +49,28 @@ INSTALLED_APPS = [
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
+# login links stop working after this many seconds
+LOGIN_TOKEN_TTL = 60 * 60
+# 'db' keeps login tokens in the Token table, 'signed' puts them in the
+# link itself signed with SECRET_KEY, see accounts/tokens.py
+LOGIN_TOKEN_MODE = os.environ.get('LOGIN_TOKEN_MODE', 'db')
+# (requests, seconds) allowed to send_login_email per address and per client IP
+LOGIN_EMAIL_RATE_LIMIT_PER_EMAIL = (5, 60 * 60)
+LOGIN_EMAIL_RATE_LIMIT_PER_IP = (20, 60 * 60)
+# repeated requests for the same address within this many seconds reuse
+# the link that was just sent
+LOGIN_EMAIL_COALESCE_WINDOW = 60
 AUTHENTICATION_BACKENDS = [
   'accounts.authentication.PasswordlessAuthenticationBackend',
 ]
+# users looked up by the authentication backend are kept in memory by
+# every worker, for at most this many seconds
+USER_CACHE_SIZE = 1000
+USER_CACHE_TTL = 60
 
 MIDDLEWARE = [
+    'superlists.metrics.MetricsMiddleware',
+    'superlists.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +82,14 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'superlists.urls'
 
+# Per-view request metrics, scraped from /metrics in Prometheus format.
+# Every worker writes its counters to METRICS_DIR; '' is the peer address
+# gunicorn reports for requests coming through its unix socket, so nginx
+# must not proxy /metrics from the outside.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, '../metrics'))
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1', '']
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -83,16 +108,140 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'superlists.wsgi.application'
 
+# How ExistingListItemForm detects duplicate items: 'select' looks the text
+# up before saving, 'constraint' inserts straight away and turns the unique
+# index violation into the same form error
+LISTS_DUPLICATE_CHECK = 'select'
+# How view_list renders: 'paginate' sends the first page of items and
+# loads the rest over JSON, 'stream' sends the whole list as a gzipped
+# stream that starts with the header before the items are read
+LISTS_RENDER_MODE = 'paginate'
+
 
 # Database
 # https://docs.djangoproject.com/en/1.11/ref/settings/#databases
 
+# superlists.sqlite3 is Django's SQLite backend plus the PRAGMAS and
+# TRANSACTION_MODE options below, and counts queries for the request metrics
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, '../database/db.sqlite3'),
+        'ENGINE': 'superlists.sqlite3',
+        'NAME': os.environ.get(
+            'DATABASE_NAME', os.path.join(BASE_DIR, '../database/db.sqlite3')
+        ),
+    }
+}
+
+# DATABASE_PROFILE=production is meant for gunicorn with several workers:
+# WAL lets readers carry on while a write commits, synchronous=NORMAL is
+# safe with WAL (a power cut can only lose the last commits), writers wait
+# up to busy_timeout ms for the lock instead of failing with "database is
+# locked", atomic blocks take the write lock when they begin so they can
+# wait for it too, and every worker keeps its connection, with its 64MB
+# page cache and 256MB of memory mapped file, for CONN_MAX_AGE seconds.
+if os.environ.get('DATABASE_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'PRAGMAS': {
+            'busy_timeout': 5000,
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64 * 1024,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    })
+
+# DATABASE_REPLICAS lists SQLite copies of the database, comma separated,
+# kept fresh with `manage.py refresh_replica --loop`. Views decorated with
+# superlists.routers.use_replica read from them; clients stay on the
+# primary for REPLICA_PIN_SECONDS after a write, which should be longer
+# than the refresh interval.
+DATABASE_REPLICAS = []
+for _number, _path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{_number}'] = dict(
+        DATABASES['default'], NAME=_path, TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica{_number}')
+DATABASE_ROUTERS = ['superlists.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 30))
+
+
+# Cache
+# https://docs.djangoproject.com/en/1.11/topics/cache/
+# Set MEMCACHED_LOCATION (e.g. unix:/tmp/memcached.sock) to share caches
+# between gunicorn workers; memcached evicts least recently used entries
+# once its memory limit (memcached -m) is reached. The deploy installs
+# memcached and sets it in the systemd units. Without it every process
+# keeps its own local memory cache of at most MAX_ENTRIES keys, culled in
+# bulk rather than least recently used first, which only suits development.
+
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+
+# Used signed login tokens (LOGIN_TOKEN_MODE = 'signed') are kept apart in
+# LOGIN_TOKEN_CACHE_LOCATION, a memcached started with -M: when full it
+# refuses new entries, failing logins closed, instead of evicting a used
+# token whose link could then be replayed.
+LOGIN_TOKEN_CACHE_LOCATION = os.environ.get('LOGIN_TOKEN_CACHE_LOCATION')
+
+
+def _cache_backend(memcached_location, name):
+    if memcached_location:
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': memcached_location,
+        }
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': name}
+
+
+def build_caches(memcached_location, fragment_max_entries, login_token_location=None):
+    '''CACHES for memcached at memcached_location, or local memory without one
+
+    MAX_ENTRIES only means something to the local memory cache; memcached
+    takes OPTIONS as memcache.Client arguments and is sized by its -m flag
+    '''
+    backend = _cache_backend(memcached_location, '')
+    fragment_options = {}
+    if not memcached_location:
+        fragment_options = {'OPTIONS': {'MAX_ENTRIES': fragment_max_entries}}
+    return {
+        'default': backend,
+        # used by {% cache %} for rendered list tables, keyed by list version
+        'template_fragments': dict(backend, KEY_PREFIX='fragments', **fragment_options),
+        'login_tokens': _cache_backend(login_token_location, 'login_tokens'),
     }
+
+
+CACHES = build_caches(
+    MEMCACHED_LOCATION, int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 1000)),
+    LOGIN_TOKEN_CACHE_LOCATION,
+)
+# pages that are the same for every anonymous visitor, like the home page,
+# are served whole from the default cache for this many seconds
+ANONYMOUS_PAGE_CACHE_SECONDS = 60
+
+
+# Sessions and messages
+# https://docs.djangoproject.com/en/1.11/topics/http/sessions/
+# SESSION_PROFILE picks where sessions live:
+# 'db' reads a django_session row on every authenticated request,
+# 'cached_db' writes through to the database but reads from the cache;
+#   only use it with MEMCACHED_LOCATION, as local memory caches of
+#   different workers would disagree after a logout,
+# 'signed_cookies' keeps the whole session in a signed (not encrypted)
+#   cookie and never touches the database.
+
+SESSION_PROFILES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
 }
+SESSION_ENGINE = SESSION_PROFILES[os.environ.get('SESSION_PROFILE', 'db')]
+# flash messages ride along with the redirect in a cookie instead of
+# falling back to the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 
 # Password validation
@@ -133,6 +282,10 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.abspath(os.path.join(BASE_DIR, '../static'))
+if not DEBUG:
+    # collectstatic writes content hashed file names, which nginx can cache
+    # forever, with .gz and .br copies next to them; see superlists/storage.py
+    STATICFILES_STORAGE = 'superlists.storage.CompressedManifestStaticFilesStorage'
 
 LOGGING = {
     'version': 1,
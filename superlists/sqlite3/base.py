@@ -0,0 +1,67 @@
+'''SQLite backend that applies the PRAGMAS of its settings to every new connection
+
+it also counts the queries run on each connection and the time they take,
+for the request metrics of superlists.metrics
+'''
+import time
+
+from django.db.backends import utils
+from django.db.backends.sqlite3 import base
+
+
+class QueryStatsMixin(object):
+    '''cursor that adds every query to the query_count and query_time of its connection'''
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.db.query_count += 1
+            self.db.query_time += time.perf_counter() - start
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            self.db.query_count += 1
+            self.db.query_time += time.perf_counter() - start
+
+
+class StatsCursorWrapper(QueryStatsMixin, utils.CursorWrapper):
+    pass
+
+
+class StatsCursorDebugWrapper(QueryStatsMixin, utils.CursorDebugWrapper):
+    pass
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.query_count = 0
+        self.query_time = 0.0
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def make_cursor(self, cursor):
+        return StatsCursorWrapper(cursor, self)
+
+    def make_debug_cursor(self, cursor):
+        return StatsCursorDebugWrapper(cursor, self)
+
+    def _start_transaction_under_autocommit(self):
+        '''take the write lock up front when TRANSACTION_MODE is IMMEDIATE
+
+        a deferred transaction that reads before writing cannot wait for a
+        writer of another process: SQLite fails it straight away with
+        "database is locked" instead of honouring busy_timeout
+        '''
+        mode = self.settings_dict.get('TRANSACTION_MODE', '')
+        self.cursor().execute(f'BEGIN {mode}'.strip())
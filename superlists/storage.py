@@ -0,0 +1,52 @@
+'''static files storage writing precompressed copies of every collected file'''
+import gzip
+import hashlib
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # only .gz copies are written without the brotli package
+    brotli = None
+
+# source maps are left out, only developer tools fetch them
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.txt', '.json')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''hashed file names, plus .gz and .br files for nginx's gzip_static and brotli_static'''
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not dry_run and not isinstance(processed, Exception):
+                processed_names.update([name, hashed_name or name])
+        # a hashed file and its original have the same content, compress it once
+        compressed_by_digest = {}
+        for name in sorted(processed_names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.write_compressed(name, compressed_by_digest)
+
+    def write_compressed(self, name, compressed_by_digest):
+        with self.open(name) as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if digest not in compressed_by_digest:
+            compressed_by_digest[digest] = compress(content)
+        for extension, compressed in compressed_by_digest[digest]:
+            if len(compressed) < len(content):
+                compressed_name = name + extension
+                if self.exists(compressed_name):
+                    self.delete(compressed_name)
+                self._save(compressed_name, ContentFile(compressed))
+
+
+def compress(content):
+    '''(extension, compressed content) of every available encoding'''
+    encodings = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encodings.append(('.br', brotli.compress(content, quality=11)))
+    return encodings
+
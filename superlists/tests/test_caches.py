@@ -0,0 +1,27 @@
+from django.core.cache import _create_cache
+from django.test import SimpleTestCase
+
+from superlists.settings import build_caches
+
+
+class CacheSettingsTest(SimpleTestCase):
+    '''test that every cache configuration builds working backends'''
+
+    def build_backends(self, memcached_location):
+        caches = build_caches(memcached_location, fragment_max_entries=10,
+                              login_token_location=memcached_location)
+        return {
+            alias: _create_cache(params['BACKEND'], **params)
+            for alias, params in caches.items()
+        }
+
+    def test_local_memory_caches(self):
+        for alias, cache in self.build_backends(None).items():
+            cache.set('key', alias)
+            self.assertEqual(cache.get('key'), alias)
+        self.assertEqual(self.build_backends(None)['template_fragments']._max_entries, 10)
+
+    def test_memcached_caches(self):
+        for alias, cache in self.build_backends('127.0.0.1:11211').items():
+            # creating the client validates OPTIONS without needing a server
+            self.assertIsNotNone(cache._cache, alias)
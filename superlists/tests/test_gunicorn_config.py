@@ -0,0 +1,81 @@
+import gc
+import importlib
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+MB = 1024 * 1024
+
+
+class GunicornConfigTest(SimpleTestCase):
+    '''test gunicorn settings sized to the host'''
+
+    def load_config(self, **environ):
+        self.addCleanup(gc.enable)
+        with mock.patch.dict(os.environ, environ):
+            from superlists import gunicorn_config
+            return importlib.reload(gunicorn_config)
+
+    def test_workers_follow_cpus(self):
+        config = self.load_config()
+        self.assertEqual(config.worker_count(2, None), 5)
+        self.assertEqual(config.worker_count(2, 4096 * MB), 5)
+
+    def test_workers_capped_by_memory(self):
+        config = self.load_config()
+        self.assertEqual(config.worker_count(8, 500 * MB, memory_per_worker=100 * MB), 5)
+        self.assertEqual(config.worker_count(8, 50 * MB, memory_per_worker=100 * MB), 1)
+
+    def test_threads_make_up_for_missing_workers(self):
+        config = self.load_config()
+        self.assertEqual(config.thread_count(2, 5), 2)
+        self.assertEqual(config.thread_count(4, 1), 16)
+
+    def test_available_memory_read_from_meminfo(self):
+        config = self.load_config()
+        with tempfile.NamedTemporaryFile('w') as meminfo:
+            meminfo.write('MemTotal:  2048 kB\nMemAvailable:  1024 kB\n')
+            meminfo.flush()
+            self.assertEqual(config.available_memory(meminfo.name), 1024 * 1024)
+        self.assertIsNone(config.available_memory('/nonexistent/meminfo'))
+
+    def test_environment_overrides(self):
+        config = self.load_config(
+            GUNICORN_WORKERS='3', GUNICORN_WORKER_CLASS='sync', GUNICORN_PRELOAD='0',
+            GUNICORN_MAX_REQUESTS='50',
+        )
+        self.assertEqual(
+            (config.workers, config.worker_class, config.threads,
+             config.preload_app, config.max_requests),
+            (3, 'sync', 1, False, 50)
+        )
+        self.assertTrue(gc.isenabled())
+
+    def test_preload_holds_off_collection_until_ready(self):
+        config = self.load_config(GUNICORN_PRELOAD='1')
+        self.assertFalse(gc.isenabled())
+        server = mock.Mock()
+        with mock.patch('gc.freeze') as freeze:
+            config.when_ready(server)
+        freeze.assert_called_once_with()
+        self.assertTrue(gc.isenabled())
+
+    def test_worker_exit_flushes_and_child_exit_archives_metrics(self):
+        config = self.load_config(GUNICORN_PRELOAD='0')
+        worker = mock.Mock(pid=1234)
+        with mock.patch('superlists.metrics.registry') as registry, \
+                mock.patch('superlists.metrics.archive_process') as archive_process, \
+                self.settings(METRICS_ENABLED=True):
+            config.worker_exit(mock.Mock(), worker)
+            config.child_exit(mock.Mock(), worker)
+        registry.flush.assert_called_once_with()
+        archive_process.assert_called_once_with(1234)
+
+    def test_exit_hooks_do_nothing_without_metrics(self):
+        config = self.load_config(GUNICORN_PRELOAD='0')
+        with mock.patch('superlists.metrics.archive_process') as archive_process, \
+                self.settings(METRICS_ENABLED=False):
+            config.child_exit(mock.Mock(), mock.Mock(pid=1234))
+        archive_process.assert_not_called()
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from lists.models import List
+from superlists.metrics import archive_process, registry
+
+
+class MetricsTest(TestCase):
+    '''test per-view metrics'''
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            METRICS_ENABLED=True, METRICS_DIR=self.metrics_dir
+        )
+        self.settings_override.enable()
+        registry.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        registry.clear()
+        shutil.rmtree(self.metrics_dir)
+
+    def get_metrics(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_counts_requests_and_queries_per_url_name(self):
+        list_ = List.create_new(first_item_text='itemey')
+        self.client.get(f'/lists/{list_.id}/')
+        self.client.get(f'/lists/{list_.id}/')
+        body = self.get_metrics()
+        self.assertIn('superlists_requests_total{view="view_list"} 2', body)
+        self.assertIn(
+            'superlists_request_duration_seconds_count{view="view_list"} 2', body
+        )
+        self.assertIn(
+            'superlists_request_duration_seconds_bucket{view="view_list",le="+Inf"} 2', body
+        )
+        self.assertIn('superlists_sql_queries_total{view="view_list"} 3', body)
+
+    def test_adds_up_snapshots_of_other_workers(self):
+        self.client.get('/')
+        other_worker = {'home': {
+            'count': 3, 'buckets': [3] + [0] * 11, 'duration': 0.01,
+            'sql_count': 0, 'sql_time': 0.0,
+        }}
+        with open(os.path.join(self.metrics_dir, '999999.json'), 'w') as f:
+            json.dump(other_worker, f)
+        self.assertIn('superlists_requests_total{view="home"} 4', self.get_metrics())
+
+    def test_exited_worker_is_archived(self):
+        snapshot = {'home': {
+            'count': 3, 'buckets': [3] + [0] * 11, 'duration': 0.01,
+            'sql_count': 0, 'sql_time': 0.0,
+        }}
+        for pid in (999998, 999999):
+            with open(os.path.join(self.metrics_dir, f'{pid}.json'), 'w') as f:
+                json.dump(snapshot, f)
+            archive_process(pid)
+        self.assertEqual(os.listdir(self.metrics_dir), ['archive.json'])
+        self.assertIn('superlists_requests_total{view="home"} 6', self.get_metrics())
+
+    def test_flush_writes_snapshot_for_this_process(self):
+        self.client.get('/')
+        registry.flush()
+        with open(os.path.join(self.metrics_dir, f'{os.getpid()}.json')) as f:
+            self.assertEqual(json.load(f)['home']['count'], 1)
+
+    def test_only_one_thread_flushes_when_due(self):
+        registry.last_flush = 0
+        with mock.patch.object(registry, 'flush') as flush:
+            threads = [
+                threading.Thread(target=registry.record, args=('home', 0.01, 0, 0.0))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        flush.assert_called_once_with()
+
+    def test_unwritable_metrics_dir_does_not_fail_requests(self):
+        not_a_directory = os.path.join(self.metrics_dir, 'file')
+        open(not_a_directory, 'w').close()
+        registry.last_flush = 0
+        with self.settings(METRICS_DIR=not_a_directory), \
+                self.assertLogs('superlists.metrics', 'WARNING'):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_hidden_from_external_addresses(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics_hidden_when_disabled(self):
+        with self.settings(METRICS_ENABLED=False):
+            response = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from superlists.page_cache import CSRF_INPUT_RE, CSRF_PLACEHOLDER, page_cache_key
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    '''test the whole page cache of the home page'''
+
+    def setUp(self):
+        cache.clear()
+
+    def csrf_tokens(self, response):
+        return self.csrf_tokens_in(response.content)
+
+    def csrf_tokens_in(self, content):
+        return set(CSRF_INPUT_RE.findall(content))
+
+    def test_second_visit_is_served_from_cache(self):
+        self.client.get('/')
+        response = Client().get('/')
+        self.assertEqual(response.templates, [])
+        self.assertContains(response, 'Start a new To-Do list')
+
+    def test_cached_page_never_stores_a_token(self):
+        response = self.client.get('/')
+        content, _ = cache.get(page_cache_key(response.wsgi_request))
+        self.assertEqual(self.csrf_tokens(response) & self.csrf_tokens_in(content), set())
+        self.assertIn(CSRF_PLACEHOLDER, content)
+
+    def test_each_visitor_gets_own_working_token(self):
+        '''test: a cached page posts fine with the token it was served with'''
+        Client().get('/')
+        client = Client(enforce_csrf_checks=True)
+        response = client.get('/')
+        self.assertEqual(response.templates, [])
+        token = self.csrf_tokens(response).pop().decode()
+        self.assertNotIn(CSRF_PLACEHOLDER, response.content)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        response = client.post(
+            '/lists/new', data={'text': 'A new item', 'csrfmiddlewaretoken': token}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_logged_in_users_are_not_served_from_cache(self):
+        self.client.get('/')
+        self.client.force_login(User.objects.create(email='edith@example.com'))
+        response = self.client.get('/')
+        self.assertTemplateUsed(response, 'home.html')
+        self.assertContains(response, 'edith@example.com')
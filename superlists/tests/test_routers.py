@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from lists.models import Item, List
+from superlists.routers import PIN_COOKIE_NAME, live_replicas, use_replica
+
+
+@use_replica
+def read_then_write_view(request):
+    '''report where reads go before and after a write'''
+    before = router.db_for_read(List)
+    if request.GET.get('assign'):
+        Item().list = List()
+    if request.GET.get('write'):
+        List.objects.create()
+    return HttpResponse(f'{before} {router.db_for_read(List)}')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+@patch('superlists.routers.live_replicas', lambda: ['replica1'])
+class ReplicaRouterTest(TestCase):
+    '''test routing of reads to replicas'''
+
+    def get(self, path='/', method='get', **cookies):
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies)
+        return read_then_write_view(request).content.decode()
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.get(), 'replica1 replica1')
+
+    def test_reads_after_write_go_to_primary(self):
+        self.assertEqual(self.get('/?write=1'), 'replica1 default')
+
+    def test_unsafe_requests_use_primary(self):
+        self.assertEqual(self.get(method='post'), 'default default')
+
+    def test_pinned_clients_use_primary(self):
+        self.assertEqual(self.get(**{PIN_COOKIE_NAME: '1'}), 'default default')
+
+    def test_reads_outside_decorated_views_use_primary(self):
+        self.assertEqual(router.db_for_read(List), 'default')
+
+    def test_writing_request_pins_client(self):
+        '''test: the page redirected to after a write reads the primary'''
+        response = self.client.post('/lists/new', data={'text': 'A new item'})
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        response = self.client.get(response['location'])
+        self.assertContains(response, 'A new item')
+
+    def test_reading_request_does_not_pin(self):
+        list_ = List.create_new(first_item_text='item')
+        response = self.client.get(
+            list_.get_absolute_url(), HTTP_COOKIE=f'{PIN_COOKIE_NAME}=1'
+        )
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_assigning_foreign_key_is_not_a_write(self):
+        '''test: Django asks db_for_write on FK assignment, that must not count'''
+        self.assertEqual(self.get('/?assign=1'), 'replica1 replica1')
+
+
+
+class LiveReplicasTest(TestCase):
+
+    def test_no_replicas_configured(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(live_replicas(), [])
+
+    def test_test_mirrors_are_skipped(self):
+        with self.settings(DATABASE_REPLICAS=['default']):
+            self.assertEqual(live_replicas(), [])
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from functional_test.management.commands.create_session import (
+    create_pre_authenticated_session)
+
+
+class SessionProfilesTest(TestCase):
+    '''test every session profile with logins and messages'''
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pre_authenticated_session_logs_in(self):
+        '''test: create_session works whatever the session engine'''
+        for profile, engine in settings.SESSION_PROFILES.items():
+            with self.subTest(profile=profile), override_settings(SESSION_ENGINE=engine):
+                email = f'{profile}@example.com'
+                client = self.client_class()  # loads the middleware afresh
+                client.cookies[settings.SESSION_COOKIE_NAME] = (
+                    create_pre_authenticated_session(email)
+                )
+                response = client.get('/')
+                self.assertEqual(response.context['user'].email, email)
+
+    def test_messages_do_not_touch_session(self):
+        '''test: flash messages are shown without saving a session'''
+        response = self.client.post(
+            '/accounts/send_login_email', data={'email': 'edith@example.com'}, follow=True
+        )
+        self.assertEqual(len(response.context['messages']), 1)
+        self.assertEqual(Session.objects.count(), 0)
+
+    @override_settings(SESSION_ENGINE=settings.SESSION_PROFILES['signed_cookies'])
+    def test_signed_cookie_sessions_stay_out_of_database(self):
+        '''test: requests of a logged in user make no session queries'''
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = (
+            create_pre_authenticated_session('edith@example.com')
+        )
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertEqual(response.context['user'].email, 'edith@example.com')
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from superlists.sqlite3.base import DatabaseWrapper
+
+
+class PragmaDatabaseWrapperTest(SimpleTestCase):
+    '''test the SQLite backend that applies PRAGMAS'''
+
+    def test_pragmas_applied_to_new_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper(dict(
+                connection.settings_dict,
+                NAME=os.path.join(directory, 'db.sqlite3'),
+                PRAGMAS={'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                         'busy_timeout': 1234},
+            ))
+            try:
+                with wrapper.cursor() as cursor:
+                    values = []
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                        cursor.execute(f'PRAGMA {name}')
+                        values.append(cursor.fetchone()[0])
+            finally:
+                wrapper.close()
+        self.assertEqual(values, ['wal', 1, 1234])
+
+    def test_immediate_transactions_take_write_lock(self):
+        '''test: TRANSACTION_MODE IMMEDIATE locks out other writers at once'''
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, 'db.sqlite3')
+            wrapper = DatabaseWrapper(dict(
+                connection.settings_dict, NAME=name, TRANSACTION_MODE='IMMEDIATE'
+            ))
+            other = sqlite3.connect(name, timeout=0)
+            try:
+                wrapper.ensure_connection()
+                wrapper._start_transaction_under_autocommit()
+                with self.assertRaisesRegex(sqlite3.OperationalError, 'locked'):
+                    other.execute('BEGIN IMMEDIATE')
+            finally:
+                other.close()
+                wrapper.close()
+
+    def test_counts_queries_without_logging_them(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper(dict(
+                connection.settings_dict, NAME=os.path.join(directory, 'db.sqlite3')
+            ))
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('CREATE TABLE t (x)')
+                    cursor.executemany('INSERT INTO t VALUES (%s)', [(1,), (2,)])
+            finally:
+                wrapper.close()
+        self.assertEqual(wrapper.query_count, 2)
+        self.assertGreater(wrapper.query_time, 0)
+        self.assertEqual(len(wrapper.queries_log), 0)
@@ -0,0 +1,46 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from superlists import storage
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+    '''test hashed and precompressed static files'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE='superlists.storage.CompressedManifestStaticFilesStorage',
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def test_writes_compressed_copies_of_hashed_files(self):
+        hashed = staticfiles_storage.stored_name('list.js')
+        self.assertRegex(hashed, r'^list\.[0-9a-f]{12}\.js$')
+        path = os.path.join(self.static_root, hashed)
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        self.assertEqual(os.path.exists(path + '.br'), storage.brotli is not None)
+
+    def test_templates_link_hashed_names(self):
+        cache.clear()  # the home page may be in the anonymous page cache
+        response = self.client.get('/')
+        self.assertContains(response, staticfiles_storage.url('list.js'))
+        self.assertContains(response, staticfiles_storage.url('base.css'))
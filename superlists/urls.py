@@ -18,10 +18,12 @@ from django.contrib import admin
 from lists import views as list_views
 from lists import urls as list_urls
 from accounts import urls as accounts_urls
+from superlists import metrics
 
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
     url(r'^$', list_views.HomePageView.as_view(), name='home'),
     url(r'^lists/', include(list_urls)),
-    url(r'^accounts/', include(accounts_urls),)
+    url(r'^accounts/', include(accounts_urls),),
+    url(r'^metrics$', metrics.metrics, name='metrics'),
 ]